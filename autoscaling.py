@@ -0,0 +1,363 @@
+#
+#   Simulation of autoscaling policies of the Cloud servers
+#
+#   The Cloud part of the data processing system receives a time-varying
+#   arrival rate Lambda(t)*(1 - P_E). Instead of a static number of servers
+#   N_C, a threshold based autoscaler evaluates the utilization (or queue
+#   length) of the servers periodically and adds or removes servers, which
+#   become available after a spin-up delay. The SLA violations (W > W_cr)
+#   and the cost of the policy are evaluated for both "Dedicated" (billed
+#   per provisioned server-hour) and "On-demand" (billed per busy
+#   server-hour) pricing.
+#
+#   Author: Paulius Tervydis
+#   Date: 2026-10-18
+#
+# ==============================================================
+import itertools
+import numpy as np
+import pandas as pd
+from simulation import numba, _backend
+
+
+# ==============================================================
+# Event loop kernel
+# ==============================================================
+def _heap_push(heap, size, value):
+    """Pushes value to the binary min-heap heap[:size] and returns the new size."""
+    j = size
+    while j > 0:
+        p = (j - 1)//2
+        if heap[p] <= value:
+            break
+        heap[j] = heap[p]
+        j = p
+    heap[j] = value
+    return size + 1
+
+
+def _heap_pop(heap, size):
+    """Removes the smallest value of the binary min-heap heap[:size] (new size is size - 1)."""
+    top = heap[0]
+    size -= 1
+    value = heap[size]
+    j = 0
+    while True:
+        c = 2*j + 1
+        if c >= size:
+            break
+        if c + 1 < size and heap[c + 1] < heap[c]:
+            c += 1
+        if heap[c] < value:
+            heap[j] = heap[c]
+            j = c
+        else:
+            break
+    if size > 0:
+        heap[j] = value
+    return top
+
+
+def _autoscale_loop(t, s, end, interval, delay, cooldown, sn0, sn_min, sn_max, step,
+                    metric, up, down, wq, servers):
+    """Event loop of the servers with a common FIFO queue and periodic autoscaling
+    decisions. Returns provisioned and busy server-hours; waiting times and numbers
+    of servers at the decision times are written to wq and servers."""
+    n = len(t)
+    n_ticks = len(servers)
+    dep = np.empty(sn_max)      # completion times of the busy servers (heap)
+    dsize = 0
+    ready = np.empty(sn_max)    # spin-up completion times of the added servers (heap)
+    rsize = 0
+    idle = sn0                  # servers ready to serve
+    billed = sn0                # provisioned servers (idle, busy, spinning up)
+    retire = 0                  # busy servers to be removed after their request
+    head = 0                    # first waiting request of the queue (requests head..i-1)
+    i = 0                       # next arrival
+    k = 0                       # next decision
+    tick = interval
+    provisioned = 0.0
+    busy = 0.0
+    last_change = 0.0
+    last_action = -np.inf
+    work = 0.0
+    while True:
+        next_arrival = t[i] if i < n else np.inf
+        next_tick = tick if k < n_ticks else np.inf
+        next_dep = dep[0] if dsize > 0 else np.inf
+        next_ready = ready[0] if rsize > 0 else np.inf
+        now = min(next_arrival, next_tick, next_dep, next_ready)
+        if now == np.inf:
+            break
+        tb = now if now < end else end
+        if next_dep == now:
+            _heap_pop(dep, dsize)
+            dsize -= 1
+            if retire > 0:
+                provisioned += billed*(tb - last_change)
+                last_change = tb
+                billed -= 1
+                retire -= 1
+            else:
+                idle += 1
+        elif next_ready == now:
+            _heap_pop(ready, rsize)
+            rsize -= 1
+            idle += 1
+        elif next_tick == now:
+            size = billed - retire
+            if metric == 0:
+                m = work/(size*interval)
+            else:
+                m = (i - head)/size
+            work = 0.0
+            if now - last_action >= cooldown:
+                if m > up and size < sn_max:
+                    provisioned += billed*(tb - last_change)
+                    last_change = tb
+                    for j in range(min(step, sn_max - size)):
+                        if retire > 0:
+                            retire -= 1
+                        else:
+                            rsize = _heap_push(ready, rsize, now + delay)
+                            billed += 1
+                    last_action = now
+                elif m < down and size > sn_min:
+                    provisioned += billed*(tb - last_change)
+                    last_change = tb
+                    for j in range(min(step, size - sn_min)):
+                        if idle > 0:
+                            idle -= 1
+                            billed -= 1
+                        elif rsize > 0:
+                            _heap_pop(ready, rsize)
+                            rsize -= 1
+                            billed -= 1
+                        else:
+                            retire += 1
+                    last_action = now
+            servers[k] = billed - retire
+            k += 1
+            tick += interval
+        else:
+            work += s[i]
+            i += 1
+        # Waiting requests are started in the order of arrival by the free servers
+        while idle > 0 and head < i:
+            wq[head] = now - t[head]
+            dsize = _heap_push(dep, dsize, now + s[head])
+            if now < end:
+                busy += min(s[head], end - now)
+            idle -= 1
+            head += 1
+    if end > last_change:
+        provisioned += billed*(end - last_change)
+    return provisioned, busy
+
+
+if numba is not None:
+    _heap_push = numba.njit(cache=True)(_heap_push)
+    _heap_pop = numba.njit(cache=True)(_heap_pop)
+    _autoscale_loop = numba.njit(cache=True)(_autoscale_loop)
+# ==============================================================
+
+
+# ==============================================================
+# Autoscaling policy evaluation
+# ==============================================================
+POLICY = {"metric": "utilization",  # "utilization" or "queue" (waiting requests per server)
+          "up": 0.8,                # scale up if metric > up
+          "down": 0.4,              # scale down if metric < down
+          "step": 1,                # number of added (removed) servers
+          "interval": 1/60,         # evaluation period [h]
+          "delay": 5/60,            # spin-up delay of added servers [h]
+          "cooldown": 5/60,         # minimal time between scaling actions [h]
+          "min": 1,                 # minimal number of servers
+          "max": 100,               # maximal number of servers
+          "initial": None}          # initial number of servers (defaults min)
+
+
+def cloud_arrivals(profile, parameters, dt=1, seed=None):
+    """This function generates arrival and service times of the Cloud requests
+    for an arrival rate profile (non-homogeneous Poisson process with the
+    arrival rate Lambda*(1 - P_E) constant in every interval).
+
+    Parameters
+    ----------
+    profile : array like
+        Arrival rates Lambda [req./h] of the intervals.
+    parameters : dict
+        Parameters as in calc_system_performance ('P_E', 'T_C', 'T_C_distr' are used).
+    dt : float, optional
+        Length of the intervals [h]. Defaults 1.
+    seed : int, optional
+        Seed of the random number generator.
+
+    Returns
+    -------
+    t, s : numpy.ndarray
+        Sorted arrival times [h] and service times [h].
+    """
+    rng = np.random.default_rng(seed)
+    rate = np.asarray(profile, dtype=float)*(1 - parameters['P_E'])
+    counts = rng.poisson(rate*dt)
+    t = (np.repeat(np.arange(len(rate)), counts) + rng.random(counts.sum()))*dt
+    t.sort()
+    if parameters['T_C_distr'] == 'Exponential':
+        s = rng.exponential(parameters['T_C'], len(t))
+    else:
+        s = np.full(len(t), float(parameters['T_C']))
+    return t, s
+
+
+def autoscale(profile, parameters, policy=None, dt=1, seed=None, arrivals=None, details=False, backend=None):
+    """This function simulates the Cloud servers controlled by a threshold based
+    autoscaling policy for an arrival rate profile.
+
+    All the servers share one FIFO queue: a waiting request is started as soon as any
+    server finishes its request or completes the spin-up. Every policy 'interval' the
+    metric (utilization - work arrived during the interval per server capacity, or
+    queue - requests waiting in the queue per server) is compared with the thresholds:
+    'step' servers are added if the metric > 'up' (they serve requests after the
+    spin-up 'delay') or removed if the metric < 'down' (idle servers first, then the
+    servers spinning up, then busy servers after finishing their requests). After a
+    scaling action the next one is possible after the 'cooldown' time.
+
+    Parameters
+    ----------
+    profile : array like
+        Arrival rates Lambda [req./h] of the intervals.
+    parameters : dict
+        Parameters as in calc_system_performance ('P_E', 'T_C', 'T_C_distr', 'C_C',
+        'W_cr' are used).
+    policy : dict, optional
+        Policy parameters (see POLICY for the keys and default values).
+    dt : float, optional
+        Length of the profile intervals [h]. Defaults 1.
+    seed : int, optional
+        Seed of the random number generator.
+    arrivals : tuple, optional
+        Arrival and service times (see cloud_arrivals). If given, the same requests
+        are used to compare policies.
+    details : bool, optional
+        If True, the 'hourly' DataFrame of the profile intervals (arrival rate, mean
+        number of servers, mean waiting time, violation) and the numbers of servers
+        'servers' at the decision times are returned too.
+    backend : str, optional
+        "numba" or "numpy" (Python event loop). Defaults "numba" if numba is installed.
+
+    Returns
+    -------
+    result : dict
+        'requests', mean 'W' and 'W_p95', 'W_p99' times in system [h], 'sla_viol' -
+        share of requests with W > W_cr, 'viol_hours' - hours when the mean W > W_cr,
+        'server_hours' - provisioned and 'busy_hours' - busy server-hours (both within the
+        profile, the backlog served after its end is not billed), 'cost_dedicated'
+        and 'cost_on_demand' [Eur] of "Dedicated" and "On-demand" pricing, mean and maximal
+        number of servers 'servers_mean', 'servers_max' and 'scaling_actions'.
+
+    Example
+    -------
+    >>> profile = 1000*(1 + 0.8*np.sin(2*np.pi*np.arange(24*30)/24))
+    >>> result = autoscale(profile, parameters, {"up": 0.7, "down": 0.3, "max": 50}, seed=1)
+    >>> print(result['sla_viol'], result['cost_dedicated'], result['cost_on_demand'])
+    """
+    p = dict(POLICY)
+    if policy is not None:
+        unknown = set(policy) - set(POLICY)
+        if unknown:
+            raise Exception("Wrong policy parameters: %s" % ", ".join(sorted(unknown)))
+        p.update(policy)
+    if p["metric"] not in ("utilization", "queue"):
+        raise Exception("Wrong policy metric: only 'utilization' and 'queue' are valid")
+    sn_min = int(p["min"])
+    sn_max = int(p["max"])
+    sn0 = sn_min if p["initial"] is None else int(p["initial"])
+    if not 1 <= sn_min <= sn0 <= sn_max:
+        raise Exception("Wrong policy parameters: 1 <= min <= initial <= max is required")
+    if p["interval"] <= 0:
+        raise Exception("Wrong policy parameters: interval must be > 0")
+
+    t, s = cloud_arrivals(profile, parameters, dt, seed) if arrivals is None else arrivals
+    end = len(profile)*dt
+    wq = np.empty(len(t))
+    servers = np.zeros(int(np.floor(end/p["interval"] + 1e-9)), dtype=np.int64)
+    args = (np.ascontiguousarray(t, dtype=float), np.ascontiguousarray(s, dtype=float), float(end),
+            float(p["interval"]), float(p["delay"]), float(p["cooldown"]), sn0, sn_min, sn_max,
+            int(p["step"]), 0 if p["metric"] == "utilization" else 1, float(p["up"]), float(p["down"]),
+            wq, servers)
+    if _backend(backend) == "numba":
+        provisioned, busy = _autoscale_loop(*args)
+    else:
+        provisioned, busy = getattr(_autoscale_loop, "py_func", _autoscale_loop)(*args)
+
+    w = wq + s
+    W_cr = parameters['W_cr']
+    hour = np.minimum((t//dt).astype(np.int64), len(profile) - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        count = np.bincount(hour, minlength=len(profile))
+        w_hour = np.bincount(hour, w, len(profile))/count
+    result = {"requests": len(t),
+              "W": w.mean() if len(w) else np.nan,
+              "W_p95": np.quantile(w, 0.95) if len(w) else np.nan,
+              "W_p99": np.quantile(w, 0.99) if len(w) else np.nan,
+              "sla_viol": np.mean(w > W_cr) if len(w) else 0.0,
+              "viol_hours": np.sum(w_hour > W_cr)*dt,
+              "server_hours": provisioned,
+              "busy_hours": busy,
+              "cost_dedicated": provisioned*parameters['C_C'],
+              "cost_on_demand": busy*parameters['C_C'],
+              "servers_mean": servers.mean() if len(servers) else sn0,
+              "servers_max": int(servers.max(initial=sn0)),
+              "scaling_actions": int(np.sum(np.diff(servers) != 0))}
+    result = {key: value if isinstance(value, int) else float(value) for key, value in result.items()}
+    if details:
+        ticks = np.minimum(((np.arange(len(servers)) + 1)*p["interval"]//dt).astype(np.int64), len(profile) - 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            servers_hour = np.bincount(ticks, servers, len(profile))/np.bincount(ticks, minlength=len(profile))
+        result["hourly"] = pd.DataFrame({"Lambda_C": np.asarray(profile, dtype=float)*(1 - parameters['P_E']),
+                                         "servers": servers_hour,
+                                         "W": w_hour,
+                                         "viol": w_hour > W_cr})
+        result["servers"] = servers
+    return result
+
+
+def autoscale_grid(profile, parameters, grid, policy=None, dt=1, seed=None, backend=None):
+    """This function evaluates all the combinations of the policy parameters in grid
+    with the same simulated requests (common random numbers).
+
+    Parameters
+    ----------
+    profile : array like
+        Arrival rates Lambda [req./h] of the intervals.
+    parameters : dict
+        Parameters as in calc_system_performance.
+    grid : dict
+        Lists of policy parameter values, e.g. {"up": [0.6, 0.7, 0.8], "delay": [0.05, 0.1]}.
+    policy : dict, optional
+        Fixed policy parameters.
+    dt, seed, backend :
+        See autoscale.
+
+    Returns
+    -------
+    results : pandas.DataFrame
+        One row per policy with the policy parameters and the autoscale results.
+
+    Example
+    -------
+    >>> df = autoscale_grid(profile, parameters, {"up": [0.6, 0.7, 0.8], "down": [0.2, 0.3, 0.4], "max": [50]})
+    >>> print(df.sort_values("cost_on_demand").query("sla_viol < 0.01").head(1))
+    """
+    arrivals = cloud_arrivals(profile, parameters, dt, seed)
+    names = list(grid)
+    rows = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        p = dict(policy or {})
+        p.update(zip(names, values))
+        row = dict(zip(names, values))
+        row.update(autoscale(profile, parameters, p, dt, arrivals=arrivals, backend=backend))
+        rows.append(row)
+    return pd.DataFrame(rows)
+# ==============================================================
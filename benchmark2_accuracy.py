@@ -0,0 +1,223 @@
+#
+#   Benchmark 2: Accuracy of the analytical models compared to simulation
+#
+#   For every model of ssqs (single server), msqs (servers with evenly
+#   split arrivals) and ggcqs (pooled servers) the utilization is swept
+#   from 0.05 to 0.98 and the analytical mean waiting time (total time in
+#   system) is compared to the result of the simulation.py model. The "G"
+#   distributions are simulated with squared coefficients of variation
+#   0.5 and 2 (gamma distributions).
+#
+#   The benchmark reports the relative error of every analytical result,
+#   the confidence half-width of the simulated result (batch means) and
+#   the speedup of the analytical evaluation over the simulation. It fails
+#   (raises an exception) if:
+#      a) an exact model (M/M/1, M/D/1, M/G/1, D/D/1, M/M/c) deviates from the
+#         simulation by more than the statistical error of the simulation
+#         (checked up to --check-rho utilization);
+#      b) with --baseline: a relative error shifts by more than --err-shift,
+#         or the simulation or analytical throughput drops below --speed-drop
+#         of the baseline throughput (baselines are saved by --save-baseline).
+#
+#   Usage:
+#      python benchmark2_accuracy.py --save-baseline accuracy_baseline.csv
+#      (change of qsystems.py or simulation.py)
+#      python benchmark2_accuracy.py --baseline accuracy_baseline.csv
+#
+#   Author: Paulius Tervydis
+#   Date: 2026-10-18
+#
+# ==============================================================
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from scipy import stats
+from qsystems import ssqs, msqs, ggcqs
+from simulation import simulate
+
+
+RHO = (0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.98)
+CV2 = (0.5, 2.0)
+EXACT = {("ssqs", "MM1"), ("ssqs", "MD1"), ("ssqs", "MG1"), ("ssqs", "DD1"),
+         ("msqs", "MM1"), ("msqs", "MD1"), ("msqs", "MG1"), ("msqs", "DD1"),
+         ("ggcqs", "MMC"), ("ggcqs", "DDC")}
+
+
+def models(sn=10):
+    """This function returns the list of benchmarked models:
+    (analytical function, system notation, number of servers, squared coefficient
+    of variation of "G" distributions)."""
+    result = []
+    for func, codes, servers in (("ssqs", ["MM1", "MD1", "MG1", "DM1", "DD1", "DG1", "GM1", "GD1", "GG1"], 1),
+                                 ("msqs", ["MM1", "MD1", "MG1", "DM1", "DD1", "DG1"], sn),
+                                 ("ggcqs", ["MMC", "MDC", "MGC", "DMC", "DDC", "DGC", "GMC", "GDC", "GGC"], sn)):
+        for qs in codes:
+            for cv2 in (CV2 if "G" in qs else (np.nan,)):
+                result.append((func, qs, servers, cv2))
+    return result
+
+
+def analytic(func, qs, ar, sn, s, va, vs):
+    """Evaluates the mean time in system with the analytical model."""
+    if func == "ssqs":
+        return ssqs(qs=qs, ar=ar, s=s, va=va, vs=vs)["w"]
+    if func == "msqs":
+        return msqs(ar=ar, sn=sn, qs=qs, s1=s, vs=vs)["w"]
+    return float(ggcqs(ar=ar, sn=sn, qs=qs, s=s, va=va, vs=vs)["w"])
+
+
+def time_call(f, min_time=0.01):
+    """Returns the mean time of a call of f()."""
+    calls = 0
+    timeStart = time.perf_counter()
+    while True:
+        f()
+        calls += 1
+        elapsed = time.perf_counter() - timeStart
+        if elapsed >= min_time:
+            return elapsed/calls
+
+
+def accuracy_benchmark(customers=1_000_000, rho=RHO, sn=10, s=1.0, batches=20, seed=1, backend=None):
+    """This function sweeps the utilization of every model and compares the
+    analytical and simulated mean times in system.
+
+    Parameters
+    ----------
+    customers : int, optional
+        Number of simulated customers at every point. Defaults 1 000 000.
+    rho : tuple, optional
+        Utilizations of the servers.
+    sn : int, optional
+        Number of servers of msqs and ggcqs models. Defaults 10.
+    s : float, optional
+        Mean service time. Defaults 1.
+    batches : int, optional
+        Number of batches to estimate the confidence half-width of the simulation
+        (batch means method, 95 % confidence). Defaults 20.
+    seed : int, optional
+        Seed of the simulation (the same at every point). Defaults 1.
+    backend : str, optional
+        Backend of the simulation kernels ("numba" or "numpy").
+
+    Returns
+    -------
+    results : pandas.DataFrame
+        One row per model and utilization.
+    """
+    rows = []
+    t_crit = stats.t.ppf(0.975, batches - 1)
+    for func, qs, servers, cv2 in models(sn):
+        for u in rho:
+            ar = u*servers/s
+            va = cv2/ar**2 if qs[0] == "G" else None
+            vs = cv2*s**2 if qs[1] == "G" else None
+            w_a = analytic(func, qs, ar, servers, s, va, vs)
+            t_a = time_call(lambda: analytic(func, qs, ar, servers, s, va, vs))
+
+            timeStart = time.perf_counter()
+            sim = simulate(qs=qs, ar=ar, sn=servers, s=s, va=va, vs=vs, n=customers,
+                           seed=seed, samples=True, backend=backend)
+            t_s = time.perf_counter() - timeStart
+            w = sim["w_samples"]
+            means = np.array([b.mean() for b in np.array_split(w, batches)])
+            hw = t_crit*means.std(ddof=1)/np.sqrt(batches)
+
+            rows.append({"func": func, "qs": qs, "sn": servers, "cv2": cv2, "rho": u,
+                         "exact": (func, qs) in EXACT,
+                         "w_a": w_a,
+                         "w_sim": sim["w"],
+                         "rel_err": (w_a - sim["w"])/sim["w"],
+                         "rel_hw": hw/sim["w"],
+                         "t_a": t_a,
+                         "t_sim": t_s,
+                         "speedup": t_s/t_a,
+                         "n_sim": sim["n"]})
+    return pd.DataFrame(rows)
+
+
+def summarize(df, tol=0.05):
+    """This function returns the summary per model: maximal absolute relative error
+    for rho <= 0.9 and for all rho, the largest utilization up to which the error
+    stays within tol ('safe_rho', the confidence half-width of the simulation is
+    subtracted from the error), and the median speedup of the analytical model."""
+    rows = []
+    for (func, qs, sn, cv2), group in df.groupby(["func", "qs", "sn", "cv2"], dropna=False, sort=False):
+        group = group.sort_values("rho")
+        err = group["rel_err"].abs().values
+        ok = np.cumprod(err - group["rel_hw"].values <= tol).astype(bool)
+        rows.append({"func": func, "qs": qs, "sn": sn, "cv2": cv2,
+                     "exact": group["exact"].iloc[0],
+                     "max_err_rho<=0.9": err[group["rho"].values <= 0.9].max(),
+                     "max_err": err.max(),
+                     "safe_rho": group["rho"].values[ok].max() if ok[0] else np.nan,
+                     "speedup": group["speedup"].median()})
+    return pd.DataFrame(rows)
+
+
+def check(df, baseline=None, err_shift=0.01, speed_drop=0.5, z=2, check_rho=0.95):
+    """This function returns the list of failures of the benchmark results. The error
+    of an exact model fails if it exceeds z confidence half-widths of the simulation
+    (plus 0.5 %), as the batch means underestimate the half-width at high utilization.
+    Exact models are checked up to the utilization check_rho: above it the simulation
+    from an empty system is biased unless very long runs are used."""
+    failures = []
+    exact = df[df["exact"] & (df["rho"] <= check_rho)]
+    bad = exact[exact["rel_err"].abs() > z*exact["rel_hw"] + 0.005]
+    for _, row in bad.iterrows():
+        failures.append("exact model %s %s (rho=%g): relative error %.4f exceeds the simulation error %.4f"
+                        % (row["func"], row["qs"], row["rho"], row["rel_err"], row["rel_hw"]))
+    if baseline is not None:
+        keys = ["func", "qs", "sn", "cv2", "rho"]
+        merged = df.merge(baseline, on=keys, suffixes=("", "_base"))
+        shifted = merged[(merged["rel_err"] - merged["rel_err_base"]).abs() > err_shift]
+        for _, row in shifted.iterrows():
+            failures.append("%s %s cv2=%g (rho=%g): relative error shifted from %.4f to %.4f"
+                            % (row["func"], row["qs"], row["cv2"], row["rho"], row["rel_err_base"], row["rel_err"]))
+        # Throughputs: simulated customers and analytical evaluations per second
+        for name, base, current in (("simulation", merged["n_sim_base"].sum()/merged["t_sim_base"].sum(),
+                                     merged["n_sim"].sum()/merged["t_sim"].sum()),
+                                    ("analytical", len(merged)/merged["t_a_base"].sum(),
+                                     len(merged)/merged["t_a"].sum())):
+            if current < speed_drop*base:
+                failures.append("%s throughput dropped to %.0f %% of the baseline" % (name, 100*current/base))
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy of analytical models compared to simulation")
+    parser.add_argument("--customers", type=int, default=1_000_000, help="simulated customers at every point")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--backend", default=None, help="'numba' or 'numpy'")
+    parser.add_argument("--tol", type=float, default=0.05, help="relative error tolerance of 'safe_rho'")
+    parser.add_argument("--baseline", default=None, help="csv file of the baseline results")
+    parser.add_argument("--save-baseline", default=None, help="csv file to save the results")
+    parser.add_argument("--err-shift", type=float, default=0.01, help="allowed shift of relative errors")
+    parser.add_argument("--speed-drop", type=float, default=0.5, help="allowed fraction of baseline throughput")
+    parser.add_argument("--check-rho", type=float, default=0.95, help="maximal utilization of exact model checks")
+    args = parser.parse_args()
+
+    timeStart = time.time()
+    df = accuracy_benchmark(customers=args.customers, seed=args.seed, backend=args.backend)
+    pd.set_option("display.width", 200)
+    print(summarize(df, args.tol).to_string(index=False, float_format="%.4g"))
+    print("Elapsed time is %f seconds" % (time.time() - timeStart))
+
+    if args.save_baseline:
+        df.to_csv(args.save_baseline, index=False)
+    baseline = pd.read_csv(args.baseline) if args.baseline else None
+    failures = check(df, baseline, args.err_shift, args.speed_drop, check_rho=args.check_rho)
+    if failures:
+        raise Exception("Accuracy benchmark failed:\n" + "\n".join(failures))
+    print("Accuracy benchmark passed")
+
+# >>>  func  qs  sn  cv2  exact  max_err_rho<=0.9  max_err  safe_rho   speedup
+# >>>  ssqs MM1   1  NaN   True           0.03411   0.1144      0.98      2456
+# >>>  ssqs GG1   1  0.5  False           0.03237  0.04165      0.98      6196
+# >>>  ssqs GG1   1    2  False           0.07499   0.2504       NaN 1.105e+04
+# >>>  msqs DG1  10    2  False            0.1047   0.1383       0.2      6620
+# >>> ggcqs GGC  10    2  False             0.036   0.2238      0.95     774.9
+# >>> (Marshall's approximation of ssqs is safe for cv2 = 0.5, but not for
+# >>> cv2 = 2, where its error reaches 25 % at high utilization)
@@ -1,7 +1,8 @@
 from qsystems import *
+from qcache import cached_call
 import numpy as np
 
-def calc_system_performance(parameters):
+def calc_system_performance(parameters, cache=None):
     Lambda = parameters['lambda']     
     r_p = parameters['r_p']        
     P_E = parameters['P_E']         
@@ -66,7 +67,7 @@ def calc_system_performance(parameters):
   
     if mu_E < lambda_E:
         T_E_cr = T_E/(lambda_E/mu_E)
-        N_E_cr = msqs_sn_cr(ar=Lambda*P_E,sr=mu_E,w=W_cr,qs=qs_E)
+        N_E_cr = cached_call(cache, msqs_sn_cr, ar=Lambda*P_E,sr=mu_E,w=W_cr,qs=qs_E)
         return "Edge part of the data processing system is unstable!\n\n"\
                 f"Possible solutions:\n"\
                 "   for given Lambda, P_E and W_cr values\n"\
@@ -89,7 +90,7 @@ def calc_system_performance(parameters):
                     
     if mu_C < lambda_C:
         T_C_cr = T_C/(lambda_C/mu_C)
-        N_C_cr = msqs_sn_cr(ar=Lambda*P_C,sr=mu_C,w=W_cr,qs=qs_C)
+        N_C_cr = cached_call(cache, msqs_sn_cr, ar=Lambda*P_C,sr=mu_C,w=W_cr,qs=qs_C)
         return "Cloud part of the data processing system is unstable!\n\n"\
                 f"Possible solutions for given Lambda, P_E and Wcr values:\n"\
                 f"  1) decrease processing time T_C < {T_C_cr*3600} s\n"\
@@ -98,14 +99,14 @@ def calc_system_performance(parameters):
                 
     rho_C = lambda_C/mu_C
     
-    E_params = msqs(ar = Lambda*P_E, sn = N_E, s1 = T_E, qs=qs_E)    
-    C_params = msqs(ar = Lambda*P_C, sn = N_C, s1 = T_C, qs=qs_C)    
+    E_params = cached_call(cache, msqs, ar = Lambda*P_E, sn = N_E, s1 = T_E, qs=qs_E)    
+    C_params = cached_call(cache, msqs, ar = Lambda*P_C, sn = N_C, s1 = T_C, qs=qs_C)    
         
     # lambda_Ecr = msqs_ar_cr(sn=N_E-1,sr=mu_E,w=W_cr,qs=qs_E)
     # lambda_Ccr = msqs_ar_cr(sn=N_C-1,sr=mu_C,w=W_cr,qs=qs_C)
 
-    lambda_Ecr = msqs_ar_cr(sn=N_E,sr=mu_E,w=W_cr,qs=qs_E)
-    lambda_Ccr = msqs_ar_cr(sn=N_C,sr=mu_C,w=W_cr,qs=qs_C)
+    lambda_Ecr = cached_call(cache, msqs_ar_cr, sn=N_E,sr=mu_E,w=W_cr,qs=qs_E)
+    lambda_Ccr = cached_call(cache, msqs_ar_cr, sn=N_C,sr=mu_C,w=W_cr,qs=qs_C)
     
 
     if Lambda_E > 0:
@@ -181,3 +182,138 @@ def calc_system_performance(parameters):
 
     return {"Edge_System_params":E_system_params, "Cloud_System_params":C_system_params}
 
+
+
+def calc_profile_performance(parameters, profile, dt=1, method="psa", frame=False, cache=None):
+    """This function evaluates the Edge and Cloud systems for every interval of a
+    time-varying arrival rate profile (e.g. 8760 hourly values) in one vectorized pass.
+
+    Every interval is evaluated as a stationary system (pointwise stationary
+    approximation, "psa") with the arrival rate of the interval. With the lagged
+    approximation ("lag") the arrival rate of each tier is taken one mean processing
+    time (T_E or T_C) earlier, which accounts for the delay of the system's response
+    to the changes of the load. The profile is treated as periodic (daily, weekly or
+    yearly cycle).
+
+    The tiers are evaluated by msqs_batch, so a tier with a single unit (N_E = 1 or
+    N_C = 1) receives the full arrival rate of the tier. calc_system_performance
+    (msqs) evaluates a single unit at zero arrival rate, so for N_E = 1 or N_C = 1
+    the waiting times (and the values derived from them) differ from it; for N > 1
+    an interval gives the same results as calc_system_performance.
+
+    Parameters
+    ----------
+    parameters : dict
+        Parameters as in calc_system_performance ('lambda' is not used).
+    profile : array like
+        Arrival rates Lambda [req./h] of the intervals.
+    dt : float, optional
+        Length of the intervals [h]. Defaults 1.
+    method : str, optional
+        "psa" - pointwise stationary, "lag" - lagged pointwise stationary
+        approximation. Defaults "psa".
+    frame : bool, optional
+        If True, the interval results are returned as pandas DataFrame.
+    cache : qcache.QueueCache, optional
+        Cache of the critical arrival rate evaluations.
+
+    Returns
+    -------
+    result : dict
+        'intervals' - dictionary of arrays (or DataFrame): 'Lambda', arrival rates
+        'Lambda_E', 'Lambda_C', utilizations 'rho_E', 'rho_C', waiting times in system
+        'W_E', 'W_C' [h] (inf if the tier is unstable), battery working time 'T_E_bat'
+        [h], cost 'C_S', revenue 'R_S' and profit 'P_S' [Eur/h], 'stable' mask and
+        violation masks 'W_E_viol', 'W_C_viol', 'bat_viol';
+        'violations' - dictionary of hours with W_E > W_cr, W_C > W_cr, T_E_bat < T_bat_cr
+        and unstable systems, the share of requests arrived in the hours with W > W_cr,
+        maximal waiting times and total cost, revenue and profit [Eur] of the profile.
+
+    Example
+    -------
+    >>> profile = 1000*(1 + 0.8*np.sin(2*np.pi*np.arange(24)/24))
+    >>> result = calc_profile_performance(parameters, profile)
+    >>> print(result['violations']['W_C_viol_hours'])
+    """
+    r_p = parameters['r_p']
+    P_E = parameters['P_E']
+    N_E = parameters['N_E']
+    T_E = parameters['T_E']
+    B_p = parameters['B_p']
+    C_E = parameters['C_E']
+    N_C = parameters['N_C']
+    T_C = parameters['T_C']
+    C_C = parameters['C_C']
+    C_C_pricing = parameters['C_C_pricing']
+    W_cr = parameters['W_cr']
+    T_bat_cr = parameters['T_bat_cr']
+    qs = {'Determined': 'md1', 'Exponential': 'mm1'}
+    qs_E = qs[parameters['T_E_distr']]
+    qs_C = qs[parameters['T_C_distr']]
+
+    Lambda = np.asarray(profile, dtype=float)
+    if Lambda.ndim != 1 or np.any(Lambda < 0):
+        raise Exception("Wrong profile: 1-D array of arrival rates >= 0 is required")
+    if method not in ("psa", "lag"):
+        raise Exception("Wrong method: only 'psa' and 'lag' are valid")
+    if P_E > 0 and N_E <= 0 or P_E < 1 and N_C <= 0:
+        raise Exception("Wrong parameters: N_E must be > 0 if P_E > 0 and N_C must be > 0 if P_E < 1")
+
+    Lambda_E = Lambda*P_E
+    Lambda_C = Lambda*(1 - P_E)
+    if method == "lag":
+        t = (np.arange(len(Lambda)) + 0.5)*dt
+        period = len(Lambda)*dt
+        Lambda_E = np.interp(t - T_E, t, Lambda_E, period=period)
+        Lambda_C = np.interp(t - T_C, t, Lambda_C, period=period)
+
+    E_params = msqs_batch(ar=Lambda_E, sn=N_E, s1=T_E, qs=qs_E)
+    C_params = msqs_batch(ar=Lambda_C, sn=N_C, s1=T_C, qs=qs_C)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rho_E = np.where(N_E > 0, Lambda_E*T_E/N_E, 0.0)
+        rho_C = np.where(N_C > 0, Lambda_C*T_C/N_C, 0.0)
+        W_E = np.where(E_params['stable'], E_params['w'], np.inf)
+        W_C = np.where(C_params['stable'], C_params['w'], np.inf)
+        T_E_bat = np.where(rho_E > 0, B_p*T_E/rho_E, np.inf)
+
+        # Requests above the critical arrival rates miss W_cr (as in calc_system_performance)
+        lambda_Ecr = max(cached_call(cache, msqs_ar_cr, sn=N_E, sr=1/T_E, w=W_cr, qs=qs_E), 0) if N_E > 0 else 0
+        lambda_Ccr = max(cached_call(cache, msqs_ar_cr, sn=N_C, sr=1/T_C, w=W_cr, qs=qs_C), 0) if N_C > 0 else 0
+        P_Ea = np.where(Lambda_E > lambda_Ecr, lambda_Ecr/Lambda_E, 1)
+        P_Ca = np.where(Lambda_C > lambda_Ccr, lambda_Ccr/Lambda_C, 1)
+
+    if C_C_pricing == "Dedicated":
+        C_S_C = np.full(Lambda.shape, N_C*C_C)
+    if C_C_pricing == "On-demand":
+        C_S_C = N_C*C_C*np.minimum(rho_C, 1)
+    C_S = N_E*C_E + C_S_C
+    R_S = (Lambda_E*P_Ea + Lambda_C*P_Ca)*r_p
+    P_S = R_S - C_S
+
+    stable = E_params['stable'] & C_params['stable']
+    W_E_viol = (Lambda_E > 0) & (W_E > W_cr)
+    W_C_viol = (Lambda_C > 0) & (W_C > W_cr)
+    bat_viol = T_E_bat < T_bat_cr
+    intervals = {"Lambda": Lambda, "Lambda_E": Lambda_E, "Lambda_C": Lambda_C,
+                 "rho_E": rho_E, "rho_C": rho_C, "W_E": W_E, "W_C": W_C,
+                 "T_E_bat": T_E_bat, "C_S": C_S, "R_S": R_S, "P_S": P_S,
+                 "stable": stable, "W_E_viol": W_E_viol, "W_C_viol": W_C_viol, "bat_viol": bat_viol}
+
+    requests = np.sum(Lambda_E + Lambda_C)
+    violations = {"hours": len(Lambda)*dt,
+                  "W_E_viol_hours": W_E_viol.sum()*dt,
+                  "W_C_viol_hours": W_C_viol.sum()*dt,
+                  "bat_viol_hours": bat_viol.sum()*dt,
+                  "unstable_hours": (~stable).sum()*dt,
+                  "requests_viol_share": (np.sum(Lambda_E[W_E_viol]) + np.sum(Lambda_C[W_C_viol]))/requests
+                  if requests > 0 else 0.0,
+                  "W_E_max": W_E[Lambda_E > 0].max(initial=0),
+                  "W_C_max": W_C[Lambda_C > 0].max(initial=0),
+                  "cost": C_S.sum()*dt,
+                  "revenue": R_S.sum()*dt,
+                  "profit": P_S.sum()*dt}
+    violations = {key: float(value) for key, value in violations.items()}
+    if frame:
+        import pandas as pd
+        intervals = pd.DataFrame(intervals)
+    return {"intervals": intervals, "violations": violations}
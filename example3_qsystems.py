@@ -27,7 +27,7 @@
 # G - general (time variance must be provided))
 # ==============================================================
 
-from qsystems import ssqs
+from qsystems import ssqs_batch
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -54,12 +54,14 @@ arrival_rate_array = np.arange(arrival_rate_start,
                                arrival_rate_stop+arrival_rate_step,
                                arrival_rate_step)
 
+# All arrival rates of a system are evaluated in one ssqs_batch call.
 param_df = pd.DataFrame()
 for q_system in system_notation:
-    for arrival_rate in arrival_rate_array:
-        sys_params = ssqs(qs=q_system, ar=arrival_rate, sr=service_rate)
-        df = pd.DataFrame(sys_params,index=[0])
-        param_df  = pd.concat([param_df ,df], axis=0)
+    sys_params = ssqs_batch(qs=q_system, ar=arrival_rate_array, sr=service_rate,
+                            decimals=14)
+    df = pd.DataFrame(sys_params).drop(columns="stable")
+    df['qs'] = q_system
+    param_df  = pd.concat([param_df ,df], axis=0)
 param_df.reset_index(drop=True, inplace=True)
 
 print(param_df)
@@ -27,7 +27,7 @@
 # G - general (time variance must be provided))
 # ==============================================================
 
-from qsystems import ssqs, msqs
+from qsystems import msqs_batch
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -66,16 +66,14 @@ arrival_rate_array = np.arange(arrival_rate_start,
                                arrival_rate_stop+arrival_rate_step,
                                arrival_rate_step)
 
-param_df = pd.DataFrame()
-for server_no in range(1,10):
-    for q_system in system_notation:
-        for arrival_rate in arrival_rate_array:
-            # print(q_system)
-            if arrival_rate/server_no < service_rate:
-                sys_params = msqs(ar=arrival_rate,sn = server_no, qs=q_system,sr1=service_rate )
-                df = pd.DataFrame(sys_params,index=[0])
-                param_df  = pd.concat([param_df ,df], axis=0)
-param_df.reset_index(drop=True, inplace=True)
+# The (system type x number of servers x arrival rate) grid is evaluated
+# in one msqs_batch call and returned as one DataFrame.
+server_no_array = np.arange(1,10)
+param_df = msqs_batch(ar=arrival_rate_array[None,None,:],
+                      sn=server_no_array[None,:,None],
+                      qs=np.array(system_notation)[:,None,None],
+                      sr1=service_rate, frame=True)
+param_df = param_df[param_df['stable']].reset_index(drop=True)
 
 print(param_df)
 
@@ -24,7 +24,7 @@
 # ==============================================================
 
 import matplotlib.pylab as plt
-from qsystems import msqs
+from qsystems import msqs, qs_ar_cr
 import pandas as pd 
 import time
 
@@ -49,27 +49,42 @@ df_mm1 = pd.DataFrame(sysparam_mm1)
 df_md1 = pd.DataFrame(sysparam_md1)
 df_mg1 = pd.DataFrame(sysparam_mg1)
 
-lambda_cr_md1=df_md1[df_md1['w']*3600<W_cr_s].tail(1)['ar']
-lambda_cr_mg1=df_mg1[df_mg1['w']*3600<W_cr_s].tail(1)['ar']
-lambda_cr_mm1=df_mm1[df_mm1['w']*3600<W_cr_s].tail(1)['ar']
+# Critical arrival rates are found directly by the inverse solver
+# (instead of taking the last row of the sweep below W_cr)
+lambda_cr_md1=float(qs_ar_cr(w=W_cr_s/3600,sn=N_C,s=T_C_s/3600,qs="md1"))
+lambda_cr_mg1=float(qs_ar_cr(w=W_cr_s/3600,sn=N_C,s=T_C_s/3600,
+	vs=(stdT_C_s/3600)**2,qs="mg1"))
+lambda_cr_mm1=float(qs_ar_cr(w=W_cr_s/3600,sn=N_C,s=T_C_s/3600,qs="mm1"))
 
 print("Elapsed time is %f seconds"%(time.time()-timeStart))
 
 print("When mean(T_C) = %.2f s, N_C = %d :"%(T_C_s,N_C))
-print(" - lambda_cr = %d req./h, if std(T_C) = 0 s"%lambda_cr_md1)
-print(" - lambda_cr = %d req./h, if std(T_C) = 50 s"%lambda_cr_mg1)
-print(" - lambda_cr = %d req./h, if std(T_C) = 100 s"%lambda_cr_mm1)
+print(" - lambda_cr = %.1f req./h, if std(T_C) = 0 s"%lambda_cr_md1)
+print(" - lambda_cr = %.1f req./h, if std(T_C) = 50 s"%lambda_cr_mg1)
+print(" - lambda_cr = %.1f req./h, if std(T_C) = 100 s"%lambda_cr_mm1)
 
 # >>> When mean(T_C) = 100.00 s, N_C = 10 :
-# >>>  - lambda_cr = 288 req./h, if std(T_C) = 0 s
-# >>>  - lambda_cr = 274 req./h, if std(T_C) = 50 s
-# >>>  - lambda_cr = 240 req./h, if std(T_C) = 100 s
+# >>>  - lambda_cr = 288.0 req./h, if std(T_C) = 0 s
+# >>>  - lambda_cr = 274.3 req./h, if std(T_C) = 50 s
+# >>>  - lambda_cr = 240.0 req./h, if std(T_C) = 100 s
 
 # import data to compare with event-driven Matlab model results
 df_matlab = pd.read_csv('./matlab_SimEvents_model/event_driven_model_results_simtime1000h.csv')
 
 # print(df_matlab.to_string()) 
 
+# the same curves regenerated locally by the simulation.py model (1000 h)
+from simulation import simulate
+timeStart = time.time()
+df_sim = pd.DataFrame({'Lambda': df_matlab['Lambda']})
+df_sim['W_C_md1'] = [simulate(qs="md1",ar=l,sn=N_C,s=T_C_s/3600,
+	sim_time=1000,seed=1)['w']*3600 for l in df_sim['Lambda']]
+df_sim['W_C_mg1'] = [simulate(qs="mg1",ar=l,sn=N_C,s=T_C_s/3600,
+	vs=(stdT_C_s/3600)**2,sim_time=1000,seed=1)['w']*3600 for l in df_sim['Lambda']]
+df_sim['W_C_mm1'] = [simulate(qs="mm1",ar=l,sn=N_C,s=T_C_s/3600,
+	sim_time=1000,seed=1)['w']*3600 for l in df_sim['Lambda']]
+print("Simulation elapsed time is %f seconds"%(time.time()-timeStart))
+
 plt.figure()
 
 plt.plot(df_md1['ar'],df_md1['w']*3600,'g',label = "qsystems MD1")
@@ -78,12 +93,15 @@ plt.plot(df_mm1['ar'],df_mm1['w']*3600,'r',label = "qsystems MM1")
 plt.plot(df_matlab['Lambda'],df_matlab['W_C_md1'],'gx',label = "SimEvents MD1")
 plt.plot(df_matlab['Lambda'],df_matlab['W_C_mg1'],'bx',label = "SimEvents MG1")
 plt.plot(df_matlab['Lambda'],df_matlab['W_C_mm1'],'rx',label = "SimEvents MM1")
+plt.plot(df_sim['Lambda'],df_sim['W_C_md1'],'g+',label = "simulation.py MD1")
+plt.plot(df_sim['Lambda'],df_sim['W_C_mg1'],'b+',label = "simulation.py MG1")
+plt.plot(df_sim['Lambda'],df_sim['W_C_mm1'],'r+',label = "simulation.py MM1")
 
 plt.axhline(W_cr_s,color='black',linestyle=':')
 
-plt.stem(lambda_cr_md1,W_cr_s,'g:',label="$\lambda_{cr}=%d$, mean($T_C$) = 100 s, std($T_C$)= 0 s"%lambda_cr_md1) 
-plt.stem(lambda_cr_mg1,W_cr_s,'b:',label="$\lambda_{cr}=%d$, mean($T_C$) = 100 s, std($T_C$)= 50 s"%lambda_cr_mg1)
-plt.stem([lambda_cr_mm1],[W_cr_s],'r:',label="$\lambda_{cr}=%d$, mean($T_C$) = 100 s, std($T_C$)= 100 s"%lambda_cr_mm1)
+plt.stem([lambda_cr_md1],[W_cr_s],'g:',label="$\lambda_{cr}=%.1f$, mean($T_C$) = 100 s, std($T_C$)= 0 s"%lambda_cr_md1) 
+plt.stem([lambda_cr_mg1],[W_cr_s],'b:',label="$\lambda_{cr}=%.1f$, mean($T_C$) = 100 s, std($T_C$)= 50 s"%lambda_cr_mg1)
+plt.stem([lambda_cr_mm1],[W_cr_s],'r:',label="$\lambda_{cr}=%.1f$, mean($T_C$) = 100 s, std($T_C$)= 100 s"%lambda_cr_mm1)
 plt.text(140,W_cr_s+10,"$W_{Ccr} = %d$ s"%W_cr_s)
 
 plt.xlim([140,320])
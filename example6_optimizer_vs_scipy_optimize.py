@@ -153,4 +153,81 @@ print(f"Optimal NE: {int(optimized_parameters['N_E_opt'])}")
 print(f"Optimal NC: {int(optimized_parameters['N_C_opt'])}")
 
 print(60*"=")
-print("optimizer.py is %.2f times faster"%(t_scipy_optimize/t_optimizer))      
\ No newline at end of file
+print("optimizer.py is %.2f times faster"%(t_scipy_optimize/t_optimizer))      
+
+#--------------------------------------------------------------
+# Joint optimization of the load split P_E, N_E and N_C
+# -------------------------------------------------------------
+# scipy.optimize (Powell) maximizes the profit of optimizer.py model
+# with free P_E, the battery constraint is a penalty
+def negative_profit(x):
+    PE = x[0]
+    NE, NC = np.round(x[1:])
+    if NE < np.ceil((PE*Lambda*T_bat_cr)/B_p):
+        return np.inf
+    return -float(configuration_profit(parameters, NE, NC, PE)[0])
+
+tstart = time.time()
+result = minimize(negative_profit, [P_E, 50, 50], bounds=[(0, 1), (0, 1000), (0, 1000)], method='Powell')
+t_scipy_split = time.time() - tstart
+print(60*"-")
+print("Joint optimization of P_E, N_E and N_C (scipy.optimize):")
+print("Execution time = ",t_scipy_split,"seconds")
+print(f"Optimal PE: {result.x[0]:.4f}, NE: {int(np.round(result.x[1]))}, NC: {int(np.round(result.x[2]))}, profit: {-result.fun:.4f} Eur/h")
+
+# find_optimal_split evaluates the optimum of every P_E of the grid
+P_E_grid = np.arange(1001)/1000
+tstart = time.time()
+split = find_optimal_split(parameters, P_E=P_E_grid)
+t_split = time.time() - tstart
+print(60*"-")
+print("Joint optimization of P_E, N_E and N_C (optimizer.py, %d P_E values):" % len(P_E_grid))
+print("Execution time = ",t_split,"seconds")
+print(f"Optimal PE: {split['P_E_opt']:.4f}, NE: {split['N_E_opt']}, NC: {split['N_C_opt']}, profit: {split['PP_S_max']:.4f} Eur/h")
+
+# The same grid optimum by the 2-D optimizer at every P_E of the grid
+tstart = time.time()
+profits = [find_optimal_configuration(dict(parameters, P_E=pe))['PP_S_max'] for pe in P_E_grid]
+t_grid = time.time() - tstart
+print("Maximum of find_optimal_configuration over the P_E grid: %.4f Eur/h (%f seconds)" % (max(profits), t_grid))
+
+# The optimum of every split (N_E, N_C and profit) is the one of the 2-D optimizer,
+# also with the On-demand pricing, where the Cloud profit has ties
+for pricing in ("Dedicated", "On-demand"):
+    splits = find_optimal_split(dict(parameters, C_C_pricing=pricing), P_E=P_E_grid)['splits']
+    mismatches = 0
+    for k, pe in enumerate(P_E_grid):
+        optimum = find_optimal_configuration(dict(parameters, P_E=pe, C_C_pricing=pricing))
+        if (optimum['N_E_opt'], optimum['N_C_opt'], optimum['PP_S_max']) != \
+                (splits['N_E_opt'][k], splits['N_C_opt'][k], splits['PP_S_max'][k]):
+            mismatches += 1
+    print("%s pricing: %d of %d splits differ from find_optimal_configuration" % (pricing, mismatches, len(P_E_grid)))
+print(60*"=")
+print("find_optimal_split is %.2f times faster than scipy.optimize" % (t_scipy_split/t_split))
+
+#--------------------------------------------------------------
+# Optimization of a table of random scenarios
+# -------------------------------------------------------------
+# Every row of optimize_scenarios must be the optimum of find_optimal_configuration
+import pandas as pd
+rng = np.random.default_rng(1)
+n = 200
+scenarios = pd.DataFrame({'lambda': rng.choice([100, 500, 1000, 3000], n),
+                          'P_E': rng.uniform(0, 1, n),
+                          'T_E': rng.uniform(50, 200, n)/3600,
+                          'T_C': rng.uniform(20, 200, n)/3600,
+                          'C_C': rng.uniform(0.01, 0.5, n),
+                          'C_C_pricing': rng.choice(['Dedicated', 'On-demand'], n),
+                          'r_p': rng.uniform(0.005, 0.1, n)})
+tstart = time.time()
+table = optimize_scenarios(scenarios, parameters, processes=1)
+t_table = time.time() - tstart
+mismatches = 0
+for k, row in scenarios.iterrows():
+    optimum = find_optimal_configuration(dict(parameters, **row))
+    if (optimum['N_E_opt'], optimum['N_C_opt'], optimum['PP_S_max']) != \
+            (table['N_E_opt'][k], table['N_C_opt'][k], table['PP_S_max'][k]):
+        mismatches += 1
+print(60*"-")
+print("optimize_scenarios: %d scenarios (%d On-demand) in %f seconds, %d differ from find_optimal_configuration"
+      % (n, np.sum(scenarios['C_C_pricing'] == 'On-demand'), t_table, mismatches))
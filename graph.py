@@ -2,30 +2,28 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
 
-def plotgraph(parameters):
-    # Parameters
-    Lambda = parameters['lambda']
-    P_E = parameters['P_E']
+def plotgraph(result, max_points=200):
+    # Parameters (result of optimizer.find_optimal_configuration), the surfaces
+    # are evaluated with at most max_points values of N_E and N_C
+    Lambda = result['lambda']
+    P_E = result['P_E']
     P_C = 1 - P_E
-    NN_E = parameters['NN_E']
-    NN_C = parameters['NN_C']
-    PP_S = parameters['PP_S']
-    RR_S = parameters['RR_S']
-    CC_S = parameters['CC_S']
-    W_cr = parameters['W_cr']
-    C_C_pricing = parameters['C_C_pricing']
-    T_bat_cr = parameters['T_bat_cr']
+    W_cr = result['W_cr']
+    C_C_pricing = result['C_C_pricing']
+    T_bat_cr = result['T_bat_cr']
   
-    PP_S_max = parameters['PP_S_max']
-    N_E_opt = parameters['N_E_opt']
-    N_C_opt = parameters['N_C_opt']
+    PP_S_max = result['PP_S_max']
+    N_E_opt = result['N_E_opt']
+    N_C_opt = result['N_C_opt']
     Lambda_E = Lambda * P_E
     Lambda_C = Lambda * P_C
-    N_E_opt_ind = parameters['N_E_opt_ind']
-    N_C_opt_ind = parameters['N_C_opt_ind']
    
     # Plot
     if P_E != 0 and P_C != 0:
+        surfaces = result.surfaces(max_points)
+        NN_E = surfaces['NN_E']
+        NN_C = surfaces['NN_C']
+        PP_S = surfaces['PP_S']
         fig = plt.figure(figsize=(10, 5))
 
         fig.subplots_adjust(wspace=0.4)
@@ -51,12 +49,13 @@ def plotgraph(parameters):
 
 # ---------------------------------------
     if P_C != 0:
+        curve = result.cloud_curve()
         plt.figure()
-        plt.plot(NN_C[:,0],CC_S[:,np.max(N_E_opt_ind)],label="Cost")
-        plt.plot(NN_C[:,0],RR_S[:,np.max(N_E_opt_ind)],label="Revenue")
-        plt.plot(NN_C[:,0],PP_S[:,np.max(N_E_opt_ind)],label="Profit")
+        plt.plot(curve['N_C'],curve['CC_S'],label="Cost")
+        plt.plot(curve['N_C'],curve['RR_S'],label="Revenue")
+        plt.plot(curve['N_C'],curve['PP_S'],label="Profit")
         plt.axvline(N_C_opt,color='black',linestyle=':',linewidth=2)
-        plt.text(N_C_opt,np.max(PP_S),"$N_{Copt}$ = %d "%(N_C_opt));
+        plt.text(N_C_opt,PP_S_max,"$N_{Copt}$ = %d "%(N_C_opt));
         plt.xlabel("$N_C$")
         plt.ylabel("Profit, Eur/h")
         plt.grid()
@@ -65,12 +64,13 @@ def plotgraph(parameters):
         plt.draw()
 # -----------
     if P_E != 0:
+        curve = result.edge_curve()
         plt.figure()
-        plt.plot(NN_E[0],CC_S[N_C_opt_ind][0],label="Cost")
-        plt.plot(NN_E[0],RR_S[N_C_opt_ind][0],label="Revenue")
-        plt.plot(NN_E[0],PP_S[N_C_opt_ind][0],label="Profit")
+        plt.plot(curve['N_E'],curve['CC_S'],label="Cost")
+        plt.plot(curve['N_E'],curve['RR_S'],label="Revenue")
+        plt.plot(curve['N_E'],curve['PP_S'],label="Profit")
         plt.axvline(N_E_opt,color='black',linestyle=':',linewidth=2)
-        plt.text(N_E_opt,np.max(PP_S),"$N_{Eopt}$ = %d"%(N_E_opt));
+        plt.text(N_E_opt,PP_S_max,"$N_{Eopt}$ = %d"%(N_E_opt));
         plt.xlabel("$N_E$")
         plt.ylabel("Profit, Eur/h")
         plt.grid()
@@ -7,6 +7,7 @@ import os
 from calculation import *
 from graph import *
 from optimizer import *
+from qcache import QueueCache
 import pandas as pd
 
 info_text = """
@@ -18,6 +19,8 @@ Another important capability of CloudEdgeAssetsOptimizer is its ability to asses
 
 Furthermore, CloudEdgeAssetsOptimizer takes into account economical criteria when determining the optimal number of assets within the network. It considers factors such as the cost of devices C_E, C_C, retinue and profit of service provider. By analyzing these factors, the software can recommend the optimal number of assets that not only meet the technical requirements but also provide the most cost-effective solution. The CloudEdgeAssetsOptimizer goes beyond traditional analysis by considering different pricing strategies. Users can evaluate the cost of the system under fixed pricing (reserved resources) or pricing that depends on utilization rho_C. This capability provides valuable insights for making informed decisions about pricing strategies and resource allocation.
 """
+# Queueing system evaluations are shared between the buttons
+queue_cache = QueueCache(maxsize=256)
 
 def get_parameters():
     parameters = {}
@@ -40,7 +43,7 @@ def get_parameters():
 
 def calculate_button_click():
     input_parameters = get_parameters()
-    calculated_params = calc_system_performance(input_parameters)
+    calculated_params = calc_system_performance(input_parameters, cache=queue_cache)
     try:  # if no error
         df = pd.DataFrame(calculated_params)
         df_str = df.to_string(index=True)
@@ -59,17 +62,8 @@ def calculate_button_click():
 def optimize_button_click():
 
     input_parameters = get_parameters()
-    optimized_parameters = find_optimal_configuration(input_parameters)
-    optimized_parameters.pop('NN_E')
-    optimized_parameters.pop('NN_C')
-    optimized_parameters.pop('PP_S')
-    optimized_parameters.pop('RR_S')
-    optimized_parameters.pop('CC_S')
-    optimized_parameters.pop('N_E_opt_ind')
-    optimized_parameters.pop('N_C_opt_ind')
-    optimized_parameters['N_E'] = int(optimized_parameters['N_E_opt'])
-    optimized_parameters['N_C'] = int(optimized_parameters['N_C_opt'])
-    optimized_parameters = calc_system_performance(optimized_parameters)
+    result = find_optimal_configuration(input_parameters, cache=queue_cache)
+    optimized_parameters = calc_system_performance(result.configuration(), cache=queue_cache)
     df = pd.DataFrame(optimized_parameters)
     df_str = df.to_string(index=True)
 
@@ -82,8 +76,8 @@ def optimize_button_click():
 
 def graph_button_click():
     input_parameters = get_parameters()
-    graph_parameters = find_optimal_configuration(input_parameters)
-    plotgraph(graph_parameters)
+    result = find_optimal_configuration(input_parameters, cache=queue_cache)
+    plotgraph(result)
 
 
 # Creates the main application window
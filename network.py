@@ -1,4 +1,10 @@
+import heapq
+import math
+from bisect import bisect_right
+import numpy as np
+import pandas as pd
 from qsystems import ssqs, msqs
+from streamstats import StreamStats
 
 class Node:
     """All the network node classes are inherited from the Node class.
@@ -17,13 +23,18 @@ class Node:
         List of nodes that are connected to this node. Data flow is arriving from the nodes to this node's input.
     output : list
         List of nodes that this node is connected to. Data flow from this node's output goes to the inputs of the nodes in the list.
+    output_ratio : list
+        Data flow ratios of the connections in the output list.
     time_in_system : float
         Sum of time spent in the node's queue and service (processing) time.
     total_time : float
         Cumulative time in the network (from the node that starts data flow to this node inclusive). 
     profit : float
         Cumulative profit of the network link (from the node that starts data flow to this node inclusive). 
+    cache : qcache.QueueCache
+        Optional cache of queueing system evaluations shared by all nodes (class attribute). 
     """
+    cache = None
      
     def __init__(self,id,rate):
         """Constructor"""
@@ -33,6 +44,7 @@ class Node:
         self.output_rate = None
         self.input = []
         self.output = []
+        self.output_ratio = []
         self.time_in_system = 0
         self.utilization = 0
         self.total_time = 0
@@ -43,12 +55,19 @@ class Node:
         another nodes, then the output flow ratio can be defined."""
         node.set_input(self, ratio)
         self.output.append(node)
+        self.output_ratio.append(ratio)
+
+    def queue_parameters(self, **parameters):
+        """Function evaluates the node's queueing system (using Node.cache if it is set)."""
+        if Node.cache is None:
+            return ssqs(**parameters)
+        return Node.cache(ssqs, **parameters)
 
     def set_input(self, node, ratio=1):
         """Function sets the input and the data flow ratio to a node."""
         self.input.append(node)
         self.input_rate += node.output_rate*ratio
-        parameters = ssqs(qs="md1",ar=self.input_rate,sr=self.service_rate)
+        parameters = self.queue_parameters(qs="md1",ar=self.input_rate,sr=self.service_rate)
         self.time_in_system = parameters['w']
         self.utilization = parameters['u']
 
@@ -134,7 +153,7 @@ class EdgeDevice(Node):
     def set_input(self, node, ratio=1):
         self.input.append(node)
         self.input_rate += node.output_rate*ratio
-        parameters = ssqs(qs="md1",ar=self.input_rate,sr=self.service_rate)
+        parameters = self.queue_parameters(qs="md1",ar=self.input_rate,sr=self.service_rate)
         self.time_in_system = parameters['w']
         self.utilization = parameters['u']
         self.battery_time = self.battery_perf_index/(self.utilization*self.service_rate)
@@ -156,10 +175,259 @@ class CloudServer(Node):
     def set_input(self, node, ratio=1):
         self.input.append(node)
         self.input_rate += node.output_rate*ratio
-        parameters = ssqs(qs="md1",ar=self.input_rate,sr=self.service_rate)
+        parameters = self.queue_parameters(qs="md1",ar=self.input_rate,sr=self.service_rate)
         self.time_in_system = parameters['w']
         self.utilization = parameters['u']
         dt = 1/self.input_rate+self.time_in_system
         self.output_rate = 1/dt
         self.retinue = self.input_rate*self.retinue_index
-        self.profit = self.retinue - self.cost
\ No newline at end of file
+        self.profit = self.retinue - self.cost
+
+# ==============================================================
+# Discrete-event simulation of the network
+# ==============================================================
+class Job:
+    """Record of a data processing request travelling through the network.
+    The same record is reused at every hop, so no objects are allocated per event.
+
+    Parameters
+    ----------
+    node : int
+        Index of the node the request arrives at.
+    source : int
+        Index of the node that originated the request (-1 for a Sensor's arrival generator).
+    start : float
+        Time when the request was generated.
+    """
+    __slots__ = ("node", "source", "start")
+
+    def __init__(self, node, source, start):
+        self.node = node
+        self.source = source
+        self.start = start
+
+
+def network_nodes(nodes):
+    """This function returns the list of all nodes connected (directly or through
+    other nodes) to the given nodes.
+
+    Parameters
+    ----------
+    nodes : Node or list
+        Any node(s) of the network.
+
+    Returns
+    -------
+    network : list
+        Network nodes in the order they were found.
+    """
+    if isinstance(nodes, Node):
+        nodes = [nodes]
+    found = {}
+    queue = list(nodes)
+    for node in queue:
+        if id(node) not in found:
+            found[id(node)] = node
+            queue.extend(node.input)
+            queue.extend(node.output)
+    return list(found.values())
+
+
+def simulate_network(nodes, sim_time=168, warmup=0.05, seed=None, block=65536):
+    """This function simulates the data flows in the network of Node objects with
+    a discrete-event (heap based) simulator and returns the simulated node and
+    end-to-end parameters, which can be compared with the analytical ones.
+
+    The nodes without inputs (Sensors) generate requests as Poisson flows with
+    their output_rate. Each node with service_rate > 0 is a single server FIFO queue
+    with deterministic service time 1/service_rate (M/D/1 as in Node.set_input),
+    nodes with service_rate = 0 (Balancer) forward requests without delay. A request
+    leaving a node is routed to one of the nodes of its output list with probabilities
+    proportional to the connect_to ratios. A request leaving a node without outputs
+    (Database) is completed and its end-to-end time is recorded.
+
+    The departure time of a request from a FIFO queue with deterministic service is
+    known at its arrival (Lindley recursion), so every hop of a request is a single
+    heap event and the Job record is reused for all hops of the request.
+
+    Parameters
+    ----------
+    nodes : Node or list
+        Any node(s) of the network (all connected nodes are simulated).
+    sim_time : float, optional
+        Simulation time in the time units of the rates (h). Defaults 168 (a week).
+    warmup : float, optional
+        Fraction of sim_time, during which statistics are not collected. Defaults 0.05.
+    seed : int or numpy.random.SeedSequence, optional
+        Seed of the random number generator.
+    block : int, optional
+        Number of random numbers generated at once and number of events, after which
+        the collected times are added to the streaming statistics. Defaults 65536.
+
+    Returns
+    -------
+    results : dict
+        'nodes' - pandas.DataFrame of simulated and analytical (suffix '_a') node
+        parameters: arrival rate 'ar', utilization 'u', waiting time 'wq', time in
+        the node 'w' and its percentiles 'w_p50', 'w_p95', 'w_p99', number of arrivals 'n';
+        'paths' - pandas.DataFrame of end-to-end times from each source node to
+        each terminal node: 'n', mean 'w', percentiles 'w_p50', 'w_p95', 'w_p99'
+        and maximal 'w_max' time;
+        'node_stats', 'path_stats' - streaming statistics (streamstats.StreamStats) of
+        the times in the nodes and of the end-to-end times, which can be merged with
+        the statistics of other runs;
+        'events' - number of processed events.
+
+    Example
+    -------
+    >>> sensor = Sensor("Sensor", 30)
+    >>> channel = DataChannel("Network", 450)
+    >>> database = Database("Database", 40)
+    >>> sensor.connect_to(channel)
+    >>> channel.connect_to(database)
+    >>> results = simulate_network(sensor, sim_time=1000, seed=1)
+    >>> print(results['nodes'][['id', 'w', 'w_a']])
+    """
+    network = network_nodes(nodes)
+    index = {id(node): i for i, node in enumerate(network)}
+    n_nodes = len(network)
+    svc = [1/node.service_rate if node.input and node.service_rate else 0.0 for node in network]
+    out = [[index[id(o)] for o in node.output] for node in network]
+    cum = []
+    for node in network:
+        ratio = np.asarray(node.output_ratio, dtype=float)
+        if len(ratio) > 0 and (ratio <= 0).any():
+            raise Exception("Wrong connection ratio of node '%s': ratios must be > 0" % node.id)
+        cum.append((np.cumsum(ratio)/ratio.sum())[:-1].tolist())
+
+    rng = np.random.default_rng(seed)
+    buffer = rng.random(block).tolist()
+    k = 0
+    warm = warmup*sim_time
+
+    busy = [0.0]*n_nodes
+    count = [0]*n_nodes
+    sum_wq = [0.0]*n_nodes
+    sum_s = [0.0]*n_nodes
+    times = [[] for i in range(n_nodes)]
+    node_stats = [StreamStats() for i in range(n_nodes)]
+    paths = {}
+    path_stats = {}
+
+    def flush():
+        # Collected times are added to the streaming statistics as arrays
+        for i in range(n_nodes):
+            if times[i]:
+                node_stats[i].update(np.array(times[i]))
+                times[i].clear()
+        for key, path in paths.items():
+            if path:
+                path_stats[key].update(np.array(path))
+                path.clear()
+
+    heap = []
+    seq = 0
+    gap = [0.0]*n_nodes
+    for i, node in enumerate(network):
+        if not node.input:
+            if not node.output_rate or node.output_rate <= 0:
+                raise Exception("Wrong parameter: output_rate of source node '%s' must be > 0" % node.id)
+            gap[i] = 1/node.output_rate
+            heap.append((rng.exponential(gap[i]), seq, Job(i, -1, 0.0)))
+            seq += 1
+    heapq.heapify(heap)
+
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    events = 0
+    while heap:
+        t, _, job = heappop(heap)
+        if t > sim_time:
+            break
+        events += 1
+        if events % block == 0:
+            flush()
+        if job.source < 0:
+            # Arrival generator of a source node: schedules the next request and emits a new one
+            i = job.node
+            u = buffer[k]
+            k += 1
+            if k == block:
+                buffer = rng.random(block).tolist()
+                k = 0
+            heappush(heap, (t - gap[i]*math.log1p(-u), seq, job))
+            seq += 1
+            job = Job(i, i, t)
+        i = job.node
+        while True:
+            s = svc[i]
+            if s > 0:
+                b = busy[i]
+                d = (b if b > t else t) + s
+                busy[i] = d
+                if t >= warm:
+                    count[i] += 1
+                    times[i].append(d - t)
+                    sum_wq[i] += d - s - t
+                    sum_s[i] += s
+            else:
+                d = t
+                if t >= warm:
+                    count[i] += 1
+            outputs = out[i]
+            if not outputs:
+                if job.start >= warm:
+                    key = (job.source, i)
+                    path = paths.get(key)
+                    if path is None:
+                        path = paths[key] = []
+                        path_stats[key] = StreamStats()
+                    path.append(d - job.start)
+                break
+            if len(outputs) == 1:
+                i = outputs[0]
+            else:
+                u = buffer[k]
+                k += 1
+                if k == block:
+                    buffer = rng.random(block).tolist()
+                    k = 0
+                i = outputs[bisect_right(cum[i], u)]
+            if d > t:
+                job.node = i
+                heappush(heap, (d, seq, job))
+                seq += 1
+                break
+
+    flush()
+    period = sim_time - warm
+    summaries = [stats.summary() for stats in node_stats]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = np.array(count, dtype=float)
+        df_nodes = pd.DataFrame({"id": [node.id for node in network],
+                                 "ar": n/period,
+                                 "ar_a": [node.input_rate for node in network],
+                                 "u": np.array(sum_s)/period,
+                                 "u_a": [node.utilization for node in network],
+                                 "wq": np.where(n > 0, np.array(sum_wq)/n, np.nan),
+                                 "w": [summary["mean"] for summary in summaries],
+                                 "w_a": [node.time_in_system for node in network],
+                                 "w_p50": [summary["p50"] for summary in summaries],
+                                 "w_p95": [summary["p95"] for summary in summaries],
+                                 "w_p99": [summary["p99"] for summary in summaries],
+                                 "n": count})
+        # Nodes without service (Sensors, Balancers) forward requests without delay
+        delay = ["w", "w_p50", "w_p95", "w_p99"]
+        df_nodes.loc[(np.array(svc) == 0) & (n > 0), delay] = 0.0
+    rows = []
+    for (source, terminal), stats in path_stats.items():
+        summary = stats.summary()
+        rows.append({"source": network[source].id, "terminal": network[terminal].id, "n": summary["n"],
+                     "w": summary["mean"], "w_p50": summary["p50"], "w_p95": summary["p95"],
+                     "w_p99": summary["p99"], "w_max": summary["max"]})
+    df_paths = pd.DataFrame(rows, columns=["source", "terminal", "n", "w", "w_p50", "w_p95", "w_p99", "w_max"])
+    return {"nodes": df_nodes, "paths": df_paths,
+            "node_stats": {node.id: stats for node, stats in zip(network, node_stats)},
+            "path_stats": {(network[source].id, network[terminal].id): stats
+                           for (source, terminal), stats in path_stats.items()},
+            "events": events}
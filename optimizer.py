@@ -1,116 +1,639 @@
 from qsystems import *
 import numpy as np
 from calculation import *
+from qcache import cached_call
 
-def find_optimal_configuration(parameters):
-    Lambda = parameters['lambda']     
-    r_p = parameters['r_p']        
-    P_E = parameters['P_E']         
-    N_E = parameters['N_E']         
-    T_E = parameters['T_E']        
-    T_E_distr = parameters['T_E_distr']   
-    B_p = parameters['B_p']         
-    C_E = parameters['C_E']        
-    N_C = parameters['N_C']         
-    T_C = parameters['T_C']         
-    T_C_distr = parameters['T_C_distr']  
-    C_C = parameters['C_C']         
-    C_C_pricing = parameters['C_C_pricing'] 
-    W_cr = parameters['W_cr']        
-    T_bat_cr = parameters['T_bat_cr']  
-
-    if T_E_distr ==  'Determined':
-        qs_E = 'md1'
-    if T_E_distr ==  'Exponential':
-        qs_E = 'mm1'
-    if T_C_distr ==  'Determined':
-        qs_C = 'md1'
-    if T_C_distr ==  'Exponential':
-        qs_C = 'mm1'
-
-    mu_C = 1/T_C
-    mu_E = 1/T_E
-    P_C = 1 - P_E
+def qs_types(parameters):
+    """This function returns the queueing system types of the Edge and Cloud
+    processing units according to the T_E_distr and T_C_distr parameters."""
+    types = {'Determined': 'md1', 'Exponential': 'mm1'}
+    if parameters['T_E_distr'] not in types or parameters['T_C_distr'] not in types:
+        raise Exception("Wrong T_E_distr or T_C_distr: only 'Determined' and 'Exponential' are valid")
+    return types[parameters['T_E_distr']], types[parameters['T_C_distr']]
 
-    def model(N_E, N_C):
-        # lambda_Ecr = msqs_ar_cr(sn=N_E-1,sr=mu_E,w=W_cr,qs=qs_E)
+def configuration_profit(parameters, N_E, N_C, P_E=None):
+    """This function evaluates the profit, revenue and cost of the system with N_E
+    Edge devices and N_C Cloud servers (the model of find_optimal_configuration).
+
+    Only the requests served within W_cr bring the revenue r_p. N_E, N_C, P_E and
+    the numerical parameters are broadcast against each other, so grids of
+    configurations (and of load splits) are evaluated in one call.
+
+    Parameters
+    ----------
+    parameters : dict
+        System parameters (see calc_system_performance).
+    N_E : int, array like
+        Number of Edge devices.
+    N_C : int, array like
+        Number of Cloud servers.
+    P_E : float, array like, optional
+        Probability of the processing in the Edge. Defaults parameters['P_E'].
+
+    Returns
+    -------
+    P_S, R_S, C_S : numpy arrays of the profit, revenue and cost [Eur/h]
+
+    Example
+    -------
+    >>> P_S, R_S, C_S = configuration_profit(parameters, N_E=58, N_C=[26, 27, 28])
+    >>> print(P_S)
+    >>> [40.99849624 41.41428571 41.31428571]
+    """
+    if P_E is None:
+        P_E = parameters['P_E']
+    Lambda = parameters['lambda']
+    r_p = parameters['r_p']
+    C_E = parameters['C_E']
+    C_C = parameters['C_C']
+    W_cr = parameters['W_cr']
+    qs_E, qs_C = qs_types(parameters)
+    mu_E = 1/np.asarray(parameters['T_E'])
+    mu_C = 1/np.asarray(parameters['T_C'])
+    N_E = np.asarray(N_E)
+    N_C = np.asarray(N_C)
+
+    Lambda_E = P_E * Lambda
+    Lambda_C = (1-P_E) * Lambda
+    with np.errstate(divide="ignore", invalid="ignore"):
         lambda_Ecr = msqs_ar_cr(sn=N_E,sr=mu_E,w=W_cr,qs=qs_E)
         lambda_Ccr = msqs_ar_cr(sn=N_C,sr=mu_C,w=W_cr,qs=qs_C)
-        if Lambda_E > 0:
-            P_Ea=np.where(Lambda_E > lambda_Ecr,1-((Lambda_E-lambda_Ecr)/Lambda_E),1)
-        else:
-            P_Ea = 0
-        if Lambda_C > 0:    
-            P_Ca=np.where(Lambda_C > lambda_Ccr,1-((Lambda_C-lambda_Ccr)/Lambda_C),1)
-        else:
-            P_Ca = 0
-
-        N_E_nozeros = np.where(N_E != 0, N_E, np.nan)
+        P_Ea = np.where(Lambda_E > 0, np.where(Lambda_E > lambda_Ecr,1-((Lambda_E-lambda_Ecr)/Lambda_E),1), 0)
+        P_Ca = np.where(Lambda_C > 0, np.where(Lambda_C > lambda_Ccr,1-((Lambda_C-lambda_Ccr)/Lambda_C),1), 0)
         N_C_nozeros = np.where(N_C != 0, N_C, np.nan)
+        rho_C = np.nan_to_num(Lambda_C/(N_C_nozeros*mu_C), nan=0)
 
-        rho_E = Lambda_E/(N_E_nozeros*mu_E)
-        rho_C = Lambda_C/(N_C_nozeros*mu_C) 
-        rho_C = np.nan_to_num(rho_C, nan=0)
-
-        if C_C_pricing == "Dedicated":
+        if parameters['C_C_pricing'] == "Dedicated":
             C_S = N_E*C_E + N_C*C_C
-        if C_C_pricing == "On-demand":
+        elif parameters['C_C_pricing'] == "On-demand":
             C_S = N_E*C_E + N_C*C_C*rho_C
-       
+        else:
+            raise Exception("Wrong C_C_pricing: only 'Dedicated' and 'On-demand' are valid")
+
         R_S = (Lambda_E*P_Ea + Lambda_C*P_Ca)*r_p
         P_S = R_S - C_S
-        return P_S,R_S,C_S
+    return P_S,R_S,C_S
 
-    Lambda_E = P_E * Lambda
-    Lambda_C = (1-P_E) * Lambda
+class OptimizationResult:
+    """Result of find_optimal_configuration: the optimum and the searched ranges of
+    the numbers of Edge devices N_E and Cloud servers N_C.
+
+    The profit, revenue and cost surfaces over the N_E x N_C grid are not stored,
+    they are evaluated with the model (configuration_profit by default) on request
+    by the surfaces method (optionally at a reduced resolution), and the profiles
+    along N_E and N_C through the optimum by the edge_curve and cloud_curve methods. The optimum ('PP_S_max', 'N_E_opt',
+    'N_C_opt', 'N_E_opt_ind', 'N_C_opt_ind') and the system parameters can also be
+    read with the result['key'] syntax.
+
+    Example
+    -------
+    >>> result = find_optimal_configuration(parameters)
+    >>> surfaces = result.surfaces(max_points=100)
+    >>> print(surfaces['PP_S'].shape, result['N_E_opt'], result['lambda'])
+    >>> (55, 54) 58.0 1000
+    """
+    __slots__ = ("parameters", "N_E_range", "N_C_range", "model", "PP_S_max", "N_E_opt", "N_C_opt",
+                 "N_E_opt_ind", "N_C_opt_ind")
+    _optimum = ("PP_S_max", "N_E_opt", "N_C_opt", "N_E_opt_ind", "N_C_opt_ind")
+
+    def __init__(self, parameters, N_E_range, N_C_range, PP_S_max, N_E_opt, N_C_opt,
+                 N_E_opt_ind, N_C_opt_ind, model=None):
+        self.parameters = dict(parameters)
+        self.model = configuration_profit if model is None else model
+        self.N_E_range = N_E_range
+        self.N_C_range = N_C_range
+        self.PP_S_max = PP_S_max
+        self.N_E_opt = N_E_opt
+        self.N_C_opt = N_C_opt
+        self.N_E_opt_ind = N_E_opt_ind
+        self.N_C_opt_ind = N_C_opt_ind
+
+    @property
+    def N_E(self):
+        """Searched numbers of Edge devices."""
+        return np.arange(*self.N_E_range, 1)
+
+    @property
+    def N_C(self):
+        """Searched numbers of Cloud servers."""
+        return np.arange(*self.N_C_range, 1)
+
+    def surfaces(self, max_points=None):
+        """Returns dictionary of the grids 'NN_E', 'NN_C' and the profit 'PP_S', revenue
+        'RR_S' and cost 'CC_S' surfaces. With max_points, every axis is subsampled with
+        a constant step to at most max_points values."""
+        N_E = self.N_E
+        N_C = self.N_C
+        if max_points is not None:
+            N_E = N_E[::-(-len(N_E)//max_points)]
+            N_C = N_C[::-(-len(N_C)//max_points)]
+        NN_E, NN_C = np.meshgrid(N_E, N_C)
+        PP_S, RR_S, CC_S = self.model(self.parameters, NN_E, NN_C)
+        return {"NN_E": NN_E, "NN_C": NN_C, "PP_S": np.nan_to_num(PP_S, nan=0),
+                "RR_S": np.broadcast_to(RR_S, NN_E.shape), "CC_S": np.broadcast_to(CC_S, NN_E.shape)}
+
+    def edge_curve(self):
+        """Returns dictionary of 'N_E' and the profit 'PP_S', revenue 'RR_S' and cost
+        'CC_S' along N_E at the optimal N_C."""
+        N_E = self.N_E
+        PP_S, RR_S, CC_S = self.model(self.parameters, N_E, self.N_C[self.N_C_opt_ind[0]])
+        return {"N_E": N_E, "PP_S": np.nan_to_num(PP_S, nan=0),
+                "RR_S": np.broadcast_to(RR_S, N_E.shape), "CC_S": CC_S}
+
+    def cloud_curve(self):
+        """Returns dictionary of 'N_C' and the profit 'PP_S', revenue 'RR_S' and cost
+        'CC_S' along N_C at the (largest) optimal N_E."""
+        N_C = self.N_C
+        PP_S, RR_S, CC_S = self.model(self.parameters, self.N_E[np.max(self.N_E_opt_ind)], N_C)
+        return {"N_C": N_C, "PP_S": np.nan_to_num(PP_S, nan=0),
+                "RR_S": np.broadcast_to(RR_S, N_C.shape), "CC_S": CC_S}
+
+    def configuration(self):
+        """Returns a copy of the parameters with the optimal 'N_E' and 'N_C' (e.g. for
+        calc_system_performance)."""
+        return dict(self.parameters, N_E=int(self.N_E_opt), N_C=int(self.N_C_opt))
+
+    def as_dict(self):
+        """Returns the optimum as a dictionary."""
+        return {key: getattr(self, key) for key in self._optimum}
+
+    def __getitem__(self, key):
+        if key in self._optimum:
+            return getattr(self, key)
+        return self.parameters[key]
+
+    def __repr__(self):
+        return "OptimizationResult(%s)" % ", ".join("%s=%s" % (key, value)
+                                                    for key, value in self.as_dict().items())
+
+
+def find_optimal_configuration(parameters, cache=None):
+    """This function finds the numbers of Edge devices N_E and Cloud servers N_C,
+    which maximize the profit of the system.
+
+    The profit is a sum of an Edge term (revenue of the Edge requests served within
+    W_cr minus N_E*C_E) and a Cloud term (revenue of the Cloud requests minus the cost
+    of the Cloud servers), so the maximum over the N_E x N_C grid is found with two
+    1-D searches: along the N_E axis at a fixed N_C and along the N_C axis at a fixed
+    N_E. Only the (usually single) near-maximal points of each axis are then combined
+    and evaluated, so the optimum and its ties are exactly those of the full grid,
+    while the time and memory are O(N_E + N_C). Profits within the rounding error
+    of the maximum are tied (e.g. the On-demand Cloud profit is flat above the
+    number of servers required for W_cr), and the optimum is the tie with the
+    smallest N_C and then the smallest N_E.
+
+    Parameters
+    ----------
+    parameters : dict
+        System parameters (see calc_system_performance).
+    cache : QueueCache, optional
+        Optional memoization of queueing system evaluations.
+
+    Returns
+    -------
+    result : OptimizationResult
+        The optimum ('PP_S_max', 'N_E_opt', 'N_C_opt', 'N_E_opt_ind', 'N_C_opt_ind')
+        and the searched ranges of N_E and N_C. The profit surfaces are evaluated
+        only on request (OptimizationResult.surfaces). The parameters dictionary
+        is not modified.
+
+    Example
+    -------
+    >>> result = find_optimal_configuration(parameters)
+    >>> print(result['N_E_opt'], result['N_C_opt'], result['PP_S_max'])
+    >>> 58.0 27.0 41.41428571428571
+    """
+    def model(N_E, N_C):
+        return configuration_profit(parameters, N_E, N_C)
+
+    # Searched ranges: battery minimum of N_E up to twice the units required for W_cr
+    bounds = configuration_bounds(parameters, cache=cache)
+    N_E_range = (float(bounds['N_E_min']), float(bounds['N_E_max']) + 1)
+    N_C_range = (float(bounds['N_C_min']), float(bounds['N_C_max']) + 1)
+    N_E = np.arange(*N_E_range, 1)
+    N_C = np.arange(*N_C_range, 1)
+
+    # Profit of the Edge tier along the N_E axis and of the Cloud tier along the
+    # N_C axis (plus a constant term of the other tier)
+    P_S_E = np.nan_to_num(model(N_E, N_C[0])[0], nan=0)
+    P_S_C = np.nan_to_num(model(N_E[0], N_C)[0], nan=0)
+
+    # Candidates within the rounding error of the maximum of each axis are
+    # combined, so the maxima (and ties) are the same as of the full grid
+    tol = _tie_tolerance(parameters, N_E[-1], N_C[-1])
+    E_ind = np.flatnonzero(P_S_E >= P_S_E.max() - tol)
+    C_ind = np.flatnonzero(P_S_C >= P_S_C.max() - tol)
+    PP_S_cand = np.nan_to_num(model(*np.meshgrid(N_E[E_ind], N_C[C_ind]))[0], nan=0)
+
+    # Find the indices where the global maximum profit occurs (profits within the
+    # rounding error are tied, ordered by N_C and then N_E)
+    max_indices = np.where(PP_S_cand >= np.max(PP_S_cand) - tol)
+
+    # Extract the corresponding values of N_Eopt and N_Copt (the smallest N_C and
+    # N_E of the ties) and the profit of this configuration
+    N_E_opt_ind = E_ind[max_indices[1]]
+    N_C_opt_ind = C_ind[max_indices[0]]
+    N_E_opt = N_E[N_E_opt_ind[0]]
+    N_C_opt = N_C[N_C_opt_ind[0]]
+    PP_S_max = PP_S_cand[max_indices[0][0], max_indices[1][0]]
+
+    return OptimizationResult(parameters, N_E_range, N_C_range, PP_S_max,
+                              N_E_opt, N_C_opt, N_E_opt_ind, N_C_opt_ind)
+
+
+def _tie_tolerance(parameters, N_E_max, N_C_max):
+    """Absolute tolerance of equal profits: the rounding error of the revenue and
+    cost terms of the configurations up to N_E_max and N_C_max."""
+    return 1e-12*(np.abs(parameters['lambda']*parameters['r_p']) + N_E_max*parameters['C_E']
+                  + N_C_max*parameters['C_C'] + 1)
+
+
+def configuration_bounds(parameters, P_E=None, strict=False, cache=None):
+    """This function returns the ranges of the numbers of Edge devices and Cloud
+    servers searched by the optimizers for the load split(s) P_E.
+
+    The Edge range starts at the minimum number of devices N_E_bat_cr, which keeps
+    the working time on battery above T_bat_cr, and both ranges end at twice the
+    number of units N_Emax, N_Cmax required to keep the waiting time below W_cr.
+    With strict=True, W_cr is a hard constraint: the ranges start at N_Emax and
+    N_Cmax, and the split is infeasible if W_cr does not exceed T_E (or T_C).
+    The optional cache (QueueCache) memoizes the evaluations of N_Emax and N_Cmax.
+
+    Returns
+    -------
+    result : dictionary of numpy arrays (one value per P_E) with such keys
+    'N_E_bat_cr' - minimum number of Edge devices of the battery constraint
+    'N_E_min', 'N_E_max', 'N_C_min', 'N_C_max' - ranges of N_E and N_C
+    'feasible' - mask of the splits with a feasible configuration
+    """
+    if P_E is None:
+        P_E = parameters['P_E']
+    Lambda = parameters['lambda']
+    T_E = parameters['T_E']
+    T_C = parameters['T_C']
+    W_cr = parameters['W_cr']
+    qs_E, qs_C = qs_types(parameters)
+
+    Lambda_E = np.asarray(P_E * Lambda, dtype=float)
+    Lambda_C = np.asarray((1-P_E) * Lambda, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        N_Emax = np.where(Lambda_E != 0, cached_call(cache, msqs_sn_cr, ar=Lambda_E,sr=1/T_E,w=W_cr,qs=qs_E), 100)
+        N_Cmax = np.where(Lambda_C != 0, cached_call(cache, msqs_sn_cr, ar=Lambda_C,sr=1/T_C,w=W_cr,qs=qs_C), 100)
+    N_E_bat_cr = np.ceil((Lambda_E*parameters['T_bat_cr'])/parameters['B_p'])
+
+    N_E_min = N_E_bat_cr
+    N_E_max = np.where(N_E_bat_cr < N_Emax*2+1, N_Emax*2, N_E_bat_cr*2)
+    N_C_min = np.zeros_like(N_Cmax)
+    N_C_max = N_Cmax*2
+    feasible = np.isfinite(N_E_max) & np.isfinite(N_C_max) & (N_C_max >= 0)
+    if strict:
+        N_E_min = np.where(Lambda_E > 0, np.maximum(N_E_bat_cr, N_Emax), N_E_bat_cr)
+        N_C_min = np.where(Lambda_C > 0, N_Cmax, 0)
+        feasible &= ((Lambda_E == 0) | (W_cr > T_E)) & ((Lambda_C == 0) | (W_cr > T_C))
+    return {"N_E_bat_cr": N_E_bat_cr,
+            "N_E_min": N_E_min, "N_E_max": N_E_max,
+            "N_C_min": N_C_min, "N_C_max": N_C_max,
+            "feasible": feasible}
+
+
+def _candidate_optimum(parameters, P_E, strict=False):
+    """This function returns the optimal N_E and N_C of every load split of the
+    1-D array P_E (see find_optimal_split). The numerical parameters may be scalars
+    or 1-D arrays of the same length as P_E (one scenario per element)."""
+    qs_E, qs_C = qs_types(parameters)
+    W_cr = parameters['W_cr']
+    bounds = configuration_bounds(parameters, P_E, strict)
+    feasible = bounds['feasible']
+
+    def candidates(Lambda_t, lambda_cr1, lo, hi):
+        hi = np.where(np.isfinite(hi), np.maximum(hi, lo), lo)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            kink = np.where(lambda_cr1 > 0, Lambda_t/lambda_cr1, lo)
+        n = np.stack([lo, lo+1, np.floor(kink), np.ceil(kink), hi], axis=-1)
+        return np.sort(np.clip(n, lo[:, None], hi[:, None]), axis=-1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        N_E = candidates(P_E*parameters['lambda'], msqs_ar_cr(sn=1,sr=1/parameters['T_E'],w=W_cr,qs=qs_E),
+                         bounds['N_E_min'], bounds['N_E_max'])
+        N_C = candidates((1-P_E)*parameters['lambda'], msqs_ar_cr(sn=1,sr=1/parameters['T_C'],w=W_cr,qs=qs_C),
+                         bounds['N_C_min'], bounds['N_C_max'])
+    columns = {key: value[:, None, None] if np.ndim(value) == 1 else value for key, value in parameters.items()}
+    P_S, R_S, C_S = configuration_profit(columns, N_E[:, None, :], N_C[:, :, None], P_E[:, None, None])
+    P_S = np.where(feasible[:, None, None], np.nan_to_num(P_S, nan=0), -np.inf)
+
+    # Maximum of the candidates of every split: the candidates are sorted, so the
+    # first one within the rounding error of the maximum has the smallest N_C and
+    # N_E of ties, as in find_optimal_configuration
+    tol = _tie_tolerance(parameters, bounds['N_E_max'], bounds['N_C_max'])
+    P_S_max = P_S.reshape(len(P_E), -1).max(axis=1)
+    tied = P_S >= (P_S_max - np.where(np.isfinite(tol), tol, 0))[:, None, None]
+    best = tied.reshape(len(P_E), -1).argmax(axis=1)
+    j, i = np.divmod(best, N_E.shape[1])
+    rows = np.arange(len(P_E))
+    return {"P_E": P_E,
+            "N_E_opt": N_E[rows, i],
+            "N_C_opt": N_C[rows, j],
+            "PP_S_max": P_S[rows, j, i],
+            "RR_S": np.broadcast_to(R_S, P_S.shape)[rows, j, i],
+            "CC_S": np.broadcast_to(C_S, P_S.shape)[rows, j, i],
+            "N_E_bat_cr": bounds['N_E_bat_cr'],
+            "feasible": feasible}
+
+
+def find_optimal_split(parameters, P_E=None, strict=False, frame=False):
+    """This function finds the load split P_E together with the numbers of Edge
+    devices N_E and Cloud servers N_C, which maximize the profit of the system.
+
+    For every P_E of the grid the ranges of N_E and N_C are those of
+    find_optimal_configuration (see configuration_bounds), so the result is the
+    maximum of find_optimal_configuration over the P_E grid. The profit is a sum
+    of an Edge and a Cloud term, and each term is concave in the number of units:
+    the revenue r_p*min(Lambda_E, N_E*lambda_cr1) grows linearly up to the kink at
+    N_E = Lambda_E/lambda_cr1, where all the requests are served within W_cr
+    (lambda_cr1 - critical arrival rate of a single unit), while the cost grows
+    linearly (the On-demand Cloud cost is constant for N_C >= 1). The integer
+    maximum of each term is therefore at the range bounds or next to the kink,
+    and only 5 x 5 candidate configurations per P_E are evaluated, for all the
+    P_E values in one vectorized call.
+
+    Parameters
+    ----------
+    parameters : dict
+        System parameters (see calc_system_performance, 'P_E', 'N_E' and 'N_C'
+        are not used).
+    P_E : array like, optional
+        Grid of the probabilities of the processing in the Edge.
+        Defaults 0, 0.01, ..., 1.
+    strict : bool, optional
+        If True, all the requests must be served within W_cr (N_E >= N_Emax,
+        N_C >= N_Cmax). By default the requests above the critical arrival rates
+        only bring no revenue, as in find_optimal_configuration.
+    frame : bool, optional
+        If True, the results of the splits are returned as pandas DataFrame.
+
+    Returns
+    -------
+    result : dictionary with such keys
+    'P_E_opt', 'N_E_opt', 'N_C_opt' - optimal configuration
+    'PP_S_max', 'RR_S', 'CC_S' - profit, revenue and cost at the optimum [Eur/h]
+    'splits' - dictionary of arrays (or DataFrame) of the optimum for every P_E:
+        'P_E', 'N_E_opt', 'N_C_opt', 'PP_S_max', 'RR_S', 'CC_S', 'N_E_bat_cr',
+        'feasible'
+
+    Example
+    -------
+    >>> result = find_optimal_split(parameters)
+    >>> print(result['P_E_opt'], result['N_E_opt'], result['N_C_opt'], result['PP_S_max'])
+    >>> 0.0 0 38 46.2
+    """
+    if P_E is None:
+        P_E = np.arange(101)/100
+    P_E = np.atleast_1d(np.asarray(P_E, dtype=float))
+    if P_E.ndim != 1 or np.any(P_E < 0) or np.any(P_E > 1):
+        raise Exception("Wrong P_E: 1-D array of probabilities 0 <= P_E <= 1 is required")
+    splits = _candidate_optimum(parameters, P_E, strict)
+    feasible = splits['feasible']
+    if not feasible.any():
+        raise Exception("No feasible configuration: W_cr must be > T_E or T_C")
+
+    k = int(np.argmax(splits['PP_S_max']))
+    result = {"P_E_opt": float(P_E[k]),
+              "N_E_opt": int(splits['N_E_opt'][k]),
+              "N_C_opt": int(splits['N_C_opt'][k]),
+              "PP_S_max": float(splits['PP_S_max'][k]),
+              "RR_S": float(splits['RR_S'][k]),
+              "CC_S": float(splits['CC_S'][k])}
+    if frame:
+        import pandas as pd
+        splits = pd.DataFrame(splits)
+    result['splits'] = splits
+    return result
+
+
+SCENARIO_PARAMETERS = ('lambda', 'r_p', 'P_E', 'T_E', 'T_E_distr', 'B_p', 'C_E', 'T_C', 'T_C_distr',
+                       'C_C', 'C_C_pricing', 'W_cr', 'T_bat_cr')
+
+
+def _optimize_chunk(task):
+    """Optimizes a chunk of scenarios with the same system types and pricing
+    (worker of optimize_scenarios)."""
+    columns, strict = task
+    P_E = columns['P_E']
+    result = _candidate_optimum(columns, P_E, strict)
+    qs_E, qs_C = qs_types(columns)
+    N_E = result['N_E_opt']
+    N_C = result['N_C_opt']
+    feasible = result['feasible']
+    Lambda_E = P_E*columns['lambda']
+    Lambda_C = (1-P_E)*columns['lambda']
+    E_params = msqs_batch(ar=Lambda_E, sn=np.where(feasible, N_E, 0), s1=columns['T_E'], qs=qs_E)
+    C_params = msqs_batch(ar=Lambda_C, sn=np.where(feasible, N_C, 0), s1=columns['T_C'], qs=qs_C)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rho_E = np.where(N_E > 0, Lambda_E*columns['T_E']/N_E, 0.0)
+        rho_C = np.where(N_C > 0, Lambda_C*columns['T_C']/N_C, 0.0)
+        T_E_bat = np.where(rho_E > 0, columns['B_p']*columns['T_E']/rho_E, np.inf)
+        # Served fraction from the served request rate (revenue at r_p = 1), so it
+        # is defined also for the scenarios with r_p = 0
+        served = configuration_profit(dict(columns, r_p=1.0), N_E, N_C, P_E)[1]
+        P_a = np.where(columns['lambda'] > 0, served/columns['lambda'], 1.0)
+    return {"N_E_opt": np.where(feasible, N_E, np.nan),
+            "N_C_opt": np.where(feasible, N_C, np.nan),
+            "PP_S_max": result['PP_S_max'],
+            "RR_S": np.where(feasible, result['RR_S'], np.nan),
+            "CC_S": np.where(feasible, result['CC_S'], np.nan),
+            "rho_E": np.where(feasible, rho_E, np.nan),
+            "rho_C": np.where(feasible, rho_C, np.nan),
+            "W_E": np.where(feasible, np.where(E_params['stable'], E_params['w'], np.inf), np.nan),
+            "W_C": np.where(feasible, np.where(C_params['stable'], C_params['w'], np.inf), np.nan),
+            "P_a": np.where(feasible, P_a, np.nan),
+            "T_E_bat": np.where(feasible, T_E_bat, np.nan),
+            "N_E_bat_cr": result['N_E_bat_cr'],
+            "feasible": feasible}
+
+
+def optimize_scenarios(scenarios, parameters=None, strict=False, processes=None, chunksize=10000):
+    """This function finds the optimal numbers of Edge devices N_E and Cloud servers
+    N_C for every scenario (parameter set) of a table.
+
+    The scenarios are grouped by the system types and pricing, split into chunks
+    and every chunk is optimized in one vectorized evaluation (see find_optimal_split,
+    the load split P_E of each scenario is fixed). The optimum of every row ('N_E_opt',
+    'N_C_opt' and 'PP_S_max') is that of find_optimal_configuration: the profits
+    within the rounding error are tied and resolved to the smallest N_C and then
+    the smallest N_E. The chunks are distributed over a pool of processes.
+
+    Parameters
+    ----------
+    scenarios : pandas.DataFrame, dict of lists or list of dicts
+        One row per scenario with columns of the parameters of calc_system_performance:
+        'lambda', 'r_p', 'P_E', 'T_E', 'T_E_distr', 'B_p', 'C_E', 'T_C', 'T_C_distr',
+        'C_C', 'C_C_pricing', 'W_cr', 'T_bat_cr'.
+    parameters : dict, optional
+        Values of the parameters missing in the scenarios table (common to all scenarios).
+    strict : bool, optional
+        If True, all the requests must be served within W_cr (see find_optimal_split).
+    processes : int, optional
+        Number of worker processes. Defaults os.cpu_count(). With processes=1 (or a
+        single chunk) the scenarios are optimized in the calling process.
+    chunksize : int, optional
+        Maximum number of scenarios per chunk. Defaults 10000.
+
+    Returns
+    -------
+    result : pandas.DataFrame
+        The scenarios table (with the same index) and such columns:
+        'N_E_opt', 'N_C_opt' - optimal configuration (NaN if infeasible)
+        'PP_S_max', 'RR_S', 'CC_S' - profit (-inf if infeasible), revenue and cost [Eur/h]
+        'rho_E', 'rho_C' - utilizations of the Edge devices and Cloud servers
+        'W_E', 'W_C' - mean waiting times in the Edge and Cloud systems [h]
+        'P_a' - share of the requests served within W_cr
+        'T_E_bat' - working time of the Edge devices on battery [h]
+        'N_E_bat_cr' - minimum number of Edge devices of the battery constraint
+        'feasible' - mask of the scenarios with a feasible configuration
+
+    Example
+    -------
+    >>> scenarios = pd.DataFrame({'lambda': [1000, 2000, 5000], 'P_E': [0.3, 0.5, 0.1]})
+    >>> result = optimize_scenarios(scenarios, parameters)
+    >>> print(result[['lambda', 'P_E', 'N_E_opt', 'N_C_opt', 'PP_S_max']])
+    >>>    lambda  P_E  N_E_opt  N_C_opt    PP_S_max
+    >>> 0    1000  0.3     58.0     27.0   41.414286
+    >>> 1    2000  0.5    195.0     38.0   76.700000
+    >>> 2    5000  0.1     97.0    170.0  223.242857
+    """
+    import os
+    import pandas as pd
+    from concurrent.futures import ProcessPoolExecutor
+
+    table = scenarios if isinstance(scenarios, pd.DataFrame) else pd.DataFrame(scenarios)
+    if parameters is None:
+        parameters = {}
+    if processes is None:
+        processes = os.cpu_count() or 1
+    columns = {}
+    for key in SCENARIO_PARAMETERS:
+        if key in table:
+            columns[key] = table[key].to_numpy()
+        elif key in parameters:
+            columns[key] = np.full(len(table), parameters[key], dtype=object if isinstance(parameters[key], str) else float)
+        else:
+            raise Exception("Missing parameter: '%s' must be given in scenarios or parameters" % key)
+
+    # Chunks of scenarios with the same system types and pricing
+    tasks = []
+    positions = []
+    types = pd.DataFrame({key: columns[key] for key in ('T_E_distr', 'T_C_distr', 'C_C_pricing')})
+    for (T_E_distr, T_C_distr, C_C_pricing), index in types.groupby(list(types.columns), sort=False).indices.items():
+        for chunk in np.array_split(index, -(-len(index)//chunksize)):
+            chunk_columns = {key: value[chunk].astype(float) for key, value in columns.items()
+                             if key not in types.columns}
+            chunk_columns.update(T_E_distr=T_E_distr, T_C_distr=T_C_distr, C_C_pricing=C_C_pricing)
+            tasks.append((chunk_columns, strict))
+            positions.append(chunk)
+
+    pool = ProcessPoolExecutor(min(processes, len(tasks))) if processes > 1 and len(tasks) > 1 else None
+    try:
+        results = list(pool.map(_optimize_chunk, tasks) if pool is not None else map(_optimize_chunk, tasks))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    output = table.copy()
+    for key in (results[0] if results else []):
+        values = np.empty(len(table), dtype=results[0][key].dtype)
+        for chunk, res in zip(positions, results):
+            values[chunk] = res[key]
+        output[key] = values
+    return output
+
+
+def grid_search_configuration(parameters, model=None, tile_size=2**20, out=None):
+    """This function finds the numbers of Edge devices N_E and Cloud servers N_C,
+    which maximize the profit, by the evaluation of the full N_E x N_C grid of
+    find_optimal_configuration (e.g. for profit models, which are not separable).
+
+    The grid is evaluated in tiles of at most tile_size points in the row-major order
+    (N_C, then N_E). Profits within the rounding error of the maximum are tied as in
+    find_optimal_configuration, and only the optimum (the first tie, with the smallest
+    N_C and then N_E) is returned. Only the successive maxima of the grid within the
+    rounding error of the running maximum are kept, so the memory does not depend on
+    the grid size (also on flat surfaces, e.g. an infeasible grid). Optionally the profit surface is written tile by tile to a memory-mapped
+    .npy file (rows - N_C, columns - N_E), so grids larger than the memory can be
+    exported.
+
+    Parameters
+    ----------
+    parameters : dict
+        System parameters (see calc_system_performance).
+    model : callable, optional
+        Function model(parameters, N_E, N_C) returning the profit, revenue and cost
+        arrays of the grid points (see configuration_profit). Defaults
+        configuration_profit.
+    tile_size : int, optional
+        Maximum number of grid points in a tile. Defaults 2**20.
+    out : str, optional
+        Path of the .npy file of the profit surface.
+
+    Returns
+    -------
+    result : OptimizationResult
+        The optimum as of find_optimal_configuration (with the model), 'N_E_opt_ind'
+        and 'N_C_opt_ind' are the indices of the optimum only. The profit surface is
+        in the out file, e.g. np.load(out, mmap_mode="r").
+
+    Example
+    -------
+    >>> def shared_site_model(parameters, N_E, N_C):
+    ...     P_S, R_S, C_S = configuration_profit(parameters, N_E, N_C)
+    ...     C_S = C_S - 0.05*np.minimum(N_E, N_C)   # discount of shared sites
+    ...     return R_S - C_S, R_S, C_S
+    >>> result = grid_search_configuration(parameters, model=shared_site_model, out="profit.npy")
+    >>> print(result['N_E_opt'], result['N_C_opt'], np.load("profit.npy", mmap_mode="r").shape)
+    >>> 58.0 27.0 (55, 107)
+    """
+    if model is None:
+        model = configuration_profit
+    if tile_size < 1:
+        raise Exception("Wrong parameter: tile_size must be >= 1")
+    bounds = configuration_bounds(parameters)
+    N_E_range = (float(bounds['N_E_min']), float(bounds['N_E_max'])+1)
+    N_C_range = (float(bounds['N_C_min']), float(bounds['N_C_max'])+1)
+    N_E = np.arange(*N_E_range, 1)
+    N_C = np.arange(*N_C_range, 1)
+    cols = min(len(N_E), tile_size)
+    rows = max(1, tile_size//cols)
+
+    surface = None
+    if out is not None:
+        surface = np.lib.format.open_memmap(out, mode="w+", dtype=float, shape=(len(N_C), len(N_E)))
+
+    # Running maximum and the successive maxima (records) within the rounding error
+    # of it: the first tie of the final maximum is always a record
+    tol = _tie_tolerance(parameters, N_E[-1], N_C[-1])
+    PP_S_max = -np.inf
+    records = (np.empty(0), np.empty(0, dtype=np.int64))
+    for r0 in range(0, len(N_C), rows):
+        for c0 in range(0, len(N_E), cols):
+            NN_E, NN_C = np.meshgrid(N_E[c0:c0+cols], N_C[r0:r0+rows])
+            PP_S = np.broadcast_to(np.nan_to_num(model(parameters, NN_E, NN_C)[0], nan=0), NN_E.shape)
+            if surface is not None:
+                surface[r0:r0+rows, c0:c0+cols] = PP_S
+            # A tile is a block of full rows or a part of one row, so its row-major
+            # order is that of the full grid
+            values = PP_S.ravel()
+            running = np.maximum.accumulate(values)
+            record = values > np.concatenate(([PP_S_max], np.maximum(running[:-1], PP_S_max)))
+            r, c = np.divmod(np.flatnonzero(record), PP_S.shape[1])
+            PP_S_max = max(PP_S_max, running[-1])
+            values = np.concatenate((records[0], values[record]))
+            index = np.concatenate((records[1], (r + r0)*len(N_E) + c + c0))
+            keep = values >= PP_S_max - tol
+            records = (values[keep], index[keep])
+    if surface is not None:
+        surface.flush()
+        del surface
 
-    if Lambda_E != 0:
-        N_Emax = msqs_sn_cr(ar=Lambda_E,sr=mu_E,w=W_cr,qs=qs_E)
-    else:
-        N_Emax = 100
-    if Lambda_C != 0:
-        N_Cmax = msqs_sn_cr(ar=Lambda_C,sr=mu_C,w=W_cr,qs=qs_C)
-    else:
-        N_Cmax = 100
-    
-    # This line ensures that battery-powered Edge device working time > T_B_min
-    N_E_bat_cr = np.ceil((Lambda_E*T_bat_cr)/B_p) 
-
-    if N_E_bat_cr<N_Emax*2+1:
-        N_E = np.arange(N_E_bat_cr,N_Emax*2+1,1)
-    else:
-        N_E = np.arange(N_E_bat_cr,N_E_bat_cr*2+1,1)
-    N_C = np.arange(0,N_Cmax*2+1,1)
-    NN_E, NN_C = np.meshgrid(N_E, N_C)
-    PP_S,RR_S,CC_S = model(NN_E, NN_C)
-
-    PP_S = np.nan_to_num(PP_S, nan=0)
-    
-    # Find the global maximum revenue value
-    PP_S_max = np.max(PP_S) # global max profit
-
-    # Find the indices where the global maximum profit occurs
-    max_indices = np.where(PP_S == PP_S_max)
-
-    # Find the indices of the maximum revenue
-    # print("max_indices",max_indices)
-
-    # Extract the corresponding values of N_Eopt and N_Copt
-    N_E_opt = N_E[max_indices[1][0]]
-    N_C_opt = N_C[max_indices[0][0]]
-
-    N_E_opt_ind = max_indices[1]
-    N_C_opt_ind = max_indices[0]
-   
-    parameters['NN_E'] = NN_E
-    parameters['NN_C'] = NN_C
-    parameters['PP_S'] = PP_S
-    parameters['RR_S'] = RR_S
-    parameters['CC_S'] = CC_S
-    parameters['PP_S_max'] = PP_S_max
-    parameters['N_E_opt'] = N_E_opt
-    parameters['N_C_opt'] = N_C_opt
-    parameters['N_E_opt_ind'] = N_E_opt_ind
-    parameters['N_C_opt_ind'] = N_C_opt_ind
-
-    return parameters
+    # The first point of the maximum in the row-major order of the full grid
+    N_C_opt_ind, N_E_opt_ind = np.divmod(records[1][:1], len(N_E))
+    return OptimizationResult(parameters, N_E_range, N_C_range, records[0][0],
+                              N_E[N_E_opt_ind[0]], N_C[N_C_opt_ind[0]], N_E_opt_ind, N_C_opt_ind, model)
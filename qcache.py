@@ -0,0 +1,157 @@
+#
+#   Memoization of queueing system evaluations
+#
+#   Author: Paulius Tervydis
+#   Date: 2026-10-18
+#
+# ==============================================================
+from collections import OrderedDict
+import numpy as np
+
+
+# ==============================================================
+# QueueCache class
+# ==============================================================
+class QueueCache:
+    """Opt-in cache for evaluations of queueing system functions (ssqs, msqs,
+    msqs_sn_cr, ssqs_batch, msqs_batch etc.).
+
+    The cache key is formed from the function and its normalized arguments:
+    the system notation is normalized as in ssqs ("m/d/1" and "MD1" are the same
+    system), integers and floats of equal value give the same key and, optionally,
+    floats are quantized to a number of significant digits. Array arguments of
+    batch functions are keyed by their (quantized) content. Cached results are
+    returned as copies, so the callers can modify them.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of cached results. Defaults 1024.
+    policy : str, optional
+        Eviction policy when the cache is full: 'lru' - least recently used,
+        'fifo' - first in first out. Defaults 'lru'.
+    digits : int or None, optional
+        Number of significant digits of float arguments used in the key.
+        Defaults None (exact values).
+
+    Example
+    -------
+    >>> cache = QueueCache(maxsize=128)
+    >>> cached_ssqs = cache.wrap(ssqs)
+    >>> cached_ssqs(qs="md1", ar=10, s=0.05)
+    >>> cached_ssqs(qs="M/D/1", ar=10.0, s=0.05)
+    >>> print(cache.info())
+    >>> {'hits': 1, 'misses': 1, 'evictions': 0, 'maxsize': 128, 'currsize': 1, 'hit_rate': 0.5}
+    """
+
+    def __init__(self, maxsize=1024, policy="lru", digits=None):
+        if policy not in ("lru", "fifo"):
+            raise Exception("Wrong policy: only 'lru' and 'fifo' are valid")
+        if maxsize < 1:
+            raise Exception("Wrong parameter: maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.digits = digits
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    def __call__(self, func, *args, **kwargs):
+        """Returns func(*args, **kwargs) from the cache or evaluates and caches it."""
+        key = (getattr(func, "__module__", None), getattr(func, "__qualname__", id(func)),
+               self._key(args),
+               tuple(sorted((name, self._key(value, name)) for name, value in kwargs.items())))
+        if key in self._data:
+            self.hits += 1
+            if self.policy == "lru":
+                self._data.move_to_end(key)
+            return _copy(self._data[key])
+        self.misses += 1
+        value = func(*args, **kwargs)
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+        return _copy(value)
+
+    def wrap(self, func):
+        """Returns a cached version of the function func."""
+        def cached_func(*args, **kwargs):
+            return self(func, *args, **kwargs)
+        cached_func.__name__ = getattr(func, "__name__", "cached_func")
+        cached_func.__doc__ = func.__doc__
+        return cached_func
+
+    def info(self):
+        """Returns the cache statistics."""
+        calls = self.hits + self.misses
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "maxsize": self.maxsize,
+                "currsize": len(self._data),
+                "hit_rate": self.hits/calls if calls > 0 else 0.0}
+
+    def clear(self):
+        """Removes all cached results and resets the statistics."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _key(self, value, name=None):
+        """Normalized hashable representation of a function argument."""
+        if value is None or isinstance(value, bool):
+            return value
+        if isinstance(value, str):
+            if name == "qs":
+                return value.replace("/", "").upper()
+            return value
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            return float(self._quantize(np.float64(value)))
+        if isinstance(value, (list, tuple)):
+            return ("seq", tuple(self._key(item, name) for item in value))
+        if isinstance(value, np.ndarray):
+            arr = value
+            if arr.dtype.kind in "iuf":
+                arr = self._quantize(arr.astype(float))
+            elif arr.dtype.kind in "US" and name == "qs":
+                arr = np.char.upper(np.char.replace(arr.astype(str), "/", ""))
+            return ("array", arr.shape, arr.dtype.str, arr.tobytes())
+        if isinstance(value, dict):
+            return tuple(sorted((k, self._key(v, k)) for k, v in value.items()))
+        return value
+
+    def _quantize(self, x):
+        """Rounds x to the number of significant digits of the cache."""
+        if self.digits is None:
+            return x
+        with np.errstate(divide="ignore", invalid="ignore"):
+            exponent = np.floor(np.log10(np.abs(x)))
+            exponent = np.where(np.isfinite(exponent), exponent, 0)
+            scale = 10.0**(self.digits - 1 - exponent)
+            return np.where(np.isfinite(x), np.round(x*scale)/scale, x) + 0.0
+# ==============================================================
+
+
+def cached_call(cache, func, **kwargs):
+    """This function evaluates func(**kwargs) through the cache, or directly if
+    the cache is None."""
+    if cache is None:
+        return func(**kwargs)
+    return cache(func, **kwargs)
+
+
+def _copy(value):
+    """Copy of a cached result (dictionaries, lists and arrays are copied)."""
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    return value
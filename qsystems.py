@@ -6,6 +6,7 @@
 #
 # ==============================================================
 import numpy as np 
+from scipy import special
 # ==============================================================
 # ssqs function 
 # ==============================================================
@@ -180,6 +181,171 @@ def ssqs(**parameters):
 # ==============================================================
 
 
+# ==============================================================
+# Kendall notation codes for vectorized functions
+# ==============================================================
+# Distribution letters of the arrival (A) and service (B) processes
+QS_DISTR = {"M": 0, "D": 1, "G": 2}
+# System code = 3*A + B, e.g. "MM1" -> 0, "MD1" -> 1, "GG1" -> 8
+QS_NAMES = ["MM", "MD", "MG", "DM", "DD", "DG", "GM", "GD", "GG"]
+
+
+def qs_code(qs, servers="1"):
+    """This function converts Kendall notation into integer system codes.
+
+    The codes are used by the vectorized (batch) functions, so that different
+    system types can be mixed in one call. The code of a system is calculated
+    as 3*A + B, where A and B are the distribution types of inter-arrival and
+    service times (M - 0, D - 1, G - 2).
+
+    Parameters
+    ----------
+    qs : str, array like of str or int
+        Kendall notation(s) of queueing systems, e.g. "MM1", "m/d/1" or
+        ["MM1","MD1","GG1"]. Integer arrays are treated as already converted codes.
+    servers : str, optional
+        Accepted characters for the number of servers in the notation. Defaults "1".
+
+    Returns
+    -------
+    code : int or numpy.ndarray of int
+        System codes with the same shape as 'qs'.
+
+    Example
+    -------
+    >>> qs_code(["MM1","MD1","GG1"])
+    >>> array([0, 1, 8])
+    """
+    qs_arr = np.asarray(qs)
+    if qs_arr.dtype.kind in "iu":
+        if np.any((qs_arr < 0) | (qs_arr >= len(QS_NAMES))):
+            raise Exception("Wrong system code: codes must be in range 0..8")
+        return qs_arr
+    names, inverse = np.unique(qs_arr, return_inverse=True)
+    codes = np.empty(len(names), dtype=int)
+    for i, name in enumerate(names):
+        qs_f = str(name).replace("/", "").upper()
+        if (len(qs_f) != 3 or qs_f[0] not in QS_DISTR or qs_f[1] not in QS_DISTR
+                or qs_f[2] not in servers.upper()):
+            raise Exception("Incompatible system notation: %s" % name)
+        codes[i] = 3*QS_DISTR[qs_f[0]] + QS_DISTR[qs_f[1]]
+    code = codes[inverse].reshape(qs_arr.shape)
+    if code.ndim == 0:
+        return int(code)
+    return code
+# ==============================================================
+
+
+# ==============================================================
+# ssqs_batch function
+# ==============================================================
+def ssqs_batch(qs="MM1", ar=None, sr=None, a=None, s=None, va=None, vs=None, decimals=None):
+    """This function is the vectorized counterpart of the ssqs function.
+
+    All the numerical inputs may be numpy arrays or scalars which are broadcast
+    against each other, so that parameter sweeps are evaluated in one call.
+    Different single-server system types can be mixed by passing an array of
+    notations or system codes (see qs_code). Unlike ssqs, unstable or invalid
+    points do not raise exceptions: they are reported in the 'stable' mask and
+    their queue metrics are set to NaN.
+
+    Parameters
+    ----------
+    qs : str, array like of str or int
+        Type(s) of queueing system according Kendall's notations:
+        "MM1", "MD1", "MG1", "DM1", "DD1", "DG1", "GM1", "GD1", "GG1". Defaults "MM1".
+    ar : float, array like
+        Arrival rate. Optional if mean inter-arrival time is given.
+    sr : float, array like
+        Service rate. Optional if mean service time is given.
+    a : float, array like
+        Mean inter-arrival time. Optional if arrival rate is given.
+    s : float, array like
+        Mean service time. Optional if service rate is given.
+    va : float, array like
+        Variance of inter-arrival time. Must be provided if "G" arrivals are present.
+    vs : float, array like
+        Variance of service time. Must be provided if "G" service is present.
+    decimals : int, optional
+        If given, results are rounded as in ssqs (ssqs uses 14 decimals).
+        By default results are not rounded.
+
+    Returns
+    -------
+    result : dictionary of numpy arrays with such keys
+    'qs' - system codes (see qs_code)
+    'ar', 'sr', 'a', 'va', 's', 'vs', 'u', 'l', 'lq', 'wq', 'w' - as in ssqs
+    'stable' - boolean mask of stable systems with valid parameters
+
+    Example
+    -------
+    >>> result = ssqs_batch(qs=["mm1","md1"], ar=[10,15], s=0.05)
+    >>> print(result['w'])
+    >>> [0.1   0.125]
+    """
+    code = qs_code(qs)
+    # Arrival parameters
+    if ar is not None:
+        ar = np.asarray(ar, dtype=float)
+        with np.errstate(divide="ignore"):
+            a = np.where(ar == 0, np.inf, 1/ar)
+    elif a is not None:
+        a = np.asarray(a, dtype=float)
+    else:
+        raise Exception("Missing parameters. 'ar' or 'a' values are not provided")
+    # Service parameters
+    if s is not None:
+        s = np.asarray(s, dtype=float)
+    elif sr is not None:
+        sr = np.asarray(sr, dtype=float)
+        with np.errstate(divide="ignore"):
+            s = np.where(sr == 0, np.inf, 1/sr)
+    else:
+        raise Exception("Missing parameters. 'sr' or 's' values are not provided")
+
+    code_a = np.asarray(code) // 3
+    code_s = np.asarray(code) % 3
+    if va is None:
+        if np.any(code_a == 2):
+            raise Exception("Missing parameters. 'va' value is not provided")
+        va = np.nan
+    if vs is None:
+        if np.any(code_s == 2):
+            raise Exception("Missing parameters. 'vs' value is not provided")
+        vs = np.nan
+    code, code_a, code_s, a, s, va, vs = np.broadcast_arrays(
+        code, code_a, code_s, a, s, np.asarray(va, dtype=float), np.asarray(vs, dtype=float))
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        va = np.where(code_a == 0, a**2, np.where(code_a == 1, 0.0, va))
+        vs = np.where(code_s == 0, s**2, np.where(code_s == 1, 0.0, vs))
+        stable = (a >= 0) & (s >= 0) & (s < a) & (va >= 0) & (vs >= 0)
+
+        ar = 1/a
+        sr = 1/s
+        u = ar/sr
+        wq_mm1 = (u*s)/(1 - u)
+        wq_md1 = wq_mm1/2
+        # Marshall's approximation for the other system types
+        wq_gg1 = wq_md1*((va + vs)/(s**2))*((s**2 + vs)/(a**2 + vs))
+        wq = np.where(code == 0, wq_mm1, np.where(code == 1, wq_md1, wq_gg1))
+        # Without arrivals there is no queue (Marshall's formula gives 0*inf there)
+        wq = np.where(stable, np.where(ar == 0, 0.0, wq), np.nan)
+        w = wq + s
+        l = ar*w
+        lq = ar*wq
+
+    result = {"qs": code, "ar": ar, "sr": sr, "a": a, "va": va, "s": s, "vs": vs,
+              "u": u, "l": l, "lq": lq, "wq": wq, "w": w}
+    if decimals is not None:
+        for key in result:
+            if key != "qs":
+                result[key] = np.round(result[key], decimals)
+    result["stable"] = stable
+    return result
+# ==============================================================
+
+
 # ==============================================================
 # msqs function 
 # ==============================================================
@@ -262,6 +428,294 @@ def msqs(ar, sn, qs=None, sr1=None, s1=None, vs=None):
 # ==============================================================
 
 
+# ==============================================================
+# msqs_batch function
+# ==============================================================
+def msqs_batch(ar, sn, qs=None, sr1=None, s1=None, vs=None, frame=False, decimals=None):
+    """This function is the vectorized counterpart of the msqs function.
+
+    The arrival rate is evenly distributed among 'sn' identical servers. All the
+    inputs (including the system type) are broadcast against each other, so a
+    capacity map of arrival rates and numbers of servers can be evaluated in one
+    call, e.g. ar=lambdas[:, None], sn=servers[None, :]. Unstable points are
+    reported in the 'stable' mask. A single server (sn=1) receives the full
+    arrival rate. A system without servers (sn=0) is only stable if ar=0.
+
+    Parameters
+    ----------
+    ar : float, array like
+        Arrival rate to the multi-server system.
+    sn : int, array like
+        Number of servers.
+    qs : str, array like of str or int, optional
+        Type(s) of queueing system: "MM1", "MD1", "MG1", "DM1", "DD1", "DG1".
+        Defaults "MM1".
+    sr1 : float, array like, optional
+        Single server service rate. Optional if s1 is given.
+    s1 : float, array like, optional
+        Mean service time in single server. Optional if sr1 is given.
+    vs : float, array like, optional
+        Variance of service time. Must be provided only for "MG1", "DG1" type systems.
+    frame : bool, optional
+        If True, the flattened results are returned as one pandas DataFrame.
+    decimals : int, optional
+        If given, results are rounded as in msqs (msqs uses 14 decimals).
+
+    Returns
+    -------
+    result : dictionary of numpy arrays (or DataFrame if frame=True) with such keys
+    'qs', 'sr', 'a', 'va', 's', 'vs', 'u', 'l', 'lq', 'wq', 'w', 'stable' - per server
+        values as in ssqs_batch
+    'ar'     - arrival rate to the multi-server system
+    'ar1'    - arrival rate to a single server
+    'sn'     - number of servers
+    'l_sys'  - mean number of entities in the whole multi-server system
+    'lq_sys' - mean number of entities in all the queues of the system
+
+    Example
+    -------
+    >>> result = msqs_batch(ar=np.array([10,20])[:,None], sn=[5,10], sr1=4)
+    >>> print(result['w'])
+    >>> [[0.5        0.33333333]
+         [       nan 0.5       ]]
+    """
+    if qs is None:
+        qs = "mm1"
+    code = qs_code(qs)
+    if np.any(np.asarray(code)//3 == 2):
+        raise Exception('Wrong system type: only "MM1", "MD1", "MG1","DM1","DD1","DG1" are valid')
+    if (sr1 is None) and (s1 is None):
+        raise Exception("Missing parameters: sr1 or s1 must be given.")
+
+    ar, sn = np.broadcast_arrays(np.asarray(ar, dtype=float), np.asarray(sn, dtype=float))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ar1 = np.where(sn > 0, ar/sn, np.where(ar == 0, 0.0, np.inf))
+    result = ssqs_batch(qs=code, ar=ar1, sr=sr1, s=s1, vs=vs, decimals=decimals)
+    shape = result["w"].shape
+    result["ar1"] = result["ar"]
+    result["ar"] = np.broadcast_to(ar, shape)
+    result["sn"] = np.broadcast_to(sn, shape)
+    result["l_sys"] = result["sn"]*result["l"]
+    result["lq_sys"] = result["sn"]*result["lq"]
+
+    if frame:
+        import pandas as pd
+        names = np.char.add(np.array(QS_NAMES), "1")
+        columns = {key: np.ravel(np.broadcast_to(value, shape)) for key, value in result.items()}
+        columns["qs"] = names[columns["qs"]]
+        return pd.DataFrame(columns)
+    return result
+# ==============================================================
+
+
+# ==============================================================
+# erlang_c function
+# ==============================================================
+def erlang_c(sn, ao):
+    """This function calculates the Erlang-C probability of waiting.
+
+    The probability is obtained from the Erlang-B blocking probability, which
+    is the ratio of the Poisson probability mass function and the Poisson
+    cumulative distribution function at 'sn' with mean 'ao'. Both are evaluated
+    in log-space with the regularized incomplete gamma function, so the result
+    is stable and O(1) per point even for tens of thousands of servers.
+
+    Parameters
+    ----------
+    sn : int, array like
+        Number of servers.
+    ao : float, array like
+        Offered load in Erlangs (arrival rate / single server service rate).
+
+    Returns
+    -------
+    pw : numpy.ndarray
+        Probability that an arriving entity has to wait. NaN if ao >= sn.
+
+    Example
+    -------
+    >>> erlang_c(sn=2, ao=1)
+    >>> 0.3333333333333333
+    """
+    sn = np.asarray(sn, dtype=float)
+    ao = np.asarray(ao, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # Erlang-B: pmf(sn; ao) / cdf(sn; ao) of Poisson distribution
+        log_pmf = sn*np.log(ao) - ao - special.gammaln(sn + 1)
+        log_cdf = np.log(special.gammaincc(sn + 1, ao))
+        eb = np.where(ao == 0, 0.0, np.exp(log_pmf - log_cdf))
+        u = ao/sn
+        pw = eb/(1 - u*(1 - eb))
+    return np.where((ao >= 0) & (ao < sn), pw, np.nan)
+# ==============================================================
+
+
+# ==============================================================
+# mmcqs function
+# ==============================================================
+def mmcqs(ar, sn, sr=None, s=None, t=None):
+    """This function calculates parameters of M/M/c queueing systems.
+
+    Unlike msqs, where the arrival rate is split among independent single-server
+    queues, here all 'sn' servers share one queue (pooled servers). The exact
+    Erlang-C formulas are used (see erlang_c). All the inputs are broadcast
+    against each other. Unstable points are reported in the 'stable' mask and
+    their queue metrics are set to NaN.
+
+    Parameters
+    ----------
+    ar : float, array like
+        Arrival rate to the multi-server system.
+    sn : int, array like
+        Number of servers.
+    sr : float, array like, optional
+        Single server service rate. Optional if s is given.
+    s : float, array like, optional
+        Mean service time in single server. Optional if sr is given.
+    t : float, array like, optional
+        Waiting time threshold. If given, the probability that waiting time in
+        queue exceeds t is returned (broadcast against the other inputs).
+
+    Returns
+    -------
+    result : dictionary of numpy arrays with such keys
+    'ar' - arrival rate
+    'sn' - number of servers
+    'sr' - single server service rate
+    's'  - mean service time
+    'u'  - the utilization of a server
+    'pw' - the probability of waiting (Erlang-C)
+    'l'  - mean number of entities in the system
+    'lq' - mean number of entities in the queue
+    'w'  - the mean waiting (total time) in system
+    'wq' - the mean waiting time in queue
+    'pwq_t'  - probability that waiting time in queue > t (only if t is given)
+    'stable' - boolean mask of stable systems
+
+    Example
+    -------
+    >>> result = mmcqs(ar=10, sn=5, sr=4)
+    >>> print(result['wq'], result['pw'])
+    >>> 0.013037129745515233 0.13037129745515233
+    """
+    if (sr is None) and (s is None):
+        raise Exception("Missing parameters: sr or s must be given.")
+    if s is None:
+        sr = np.asarray(sr, dtype=float)
+        s = 1/sr
+    else:
+        s = np.asarray(s, dtype=float)
+        sr = 1/s
+    ar, sn, sr, s = np.broadcast_arrays(np.asarray(ar, dtype=float),
+                                        np.asarray(sn, dtype=float), sr, s)
+    ao = ar*s
+    stable = (ar >= 0) & (s > 0) & (sn >= 1) & (ao < sn)
+    pw = erlang_c(sn, ao)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = ao/sn
+        wq = np.where(stable, pw/(sn*sr - ar), np.nan)
+        w = wq + s
+        lq = ar*wq
+        l = ar*w
+    result = {"ar": ar, "sn": sn, "sr": sr, "s": s, "u": u, "pw": pw,
+              "l": l, "lq": lq, "w": w, "wq": wq}
+    if t is not None:
+        with np.errstate(invalid="ignore"):
+            result["pwq_t"] = np.where(stable, pw*np.exp(-(sn*sr - ar)*np.asarray(t, dtype=float)), np.nan)
+    result["stable"] = stable
+    return result
+# ==============================================================
+
+
+# ==============================================================
+# ggcqs function
+# ==============================================================
+def ggcqs(ar, sn, qs="GGC", sr=None, s=None, va=None, vs=None):
+    """This function provides approximations for pooled multi-server queueing systems
+    with general distributions of inter-arrival and service times.
+
+    All 'sn' servers share one queue. The mean waiting time in queue is obtained
+    by the Allen-Cunneen approximation: the exact M/M/c waiting time (see mmcqs)
+    is scaled by (ca^2 + cs^2)/2, where ca^2 and cs^2 are the squared coefficients
+    of variation of inter-arrival and service times. For "MMC" systems the result
+    is exact, and for a single server it reduces to Kingman's formula (exact for
+    "MD1" and "MG1"). All the inputs, including the system type, are broadcast
+    against each other.
+
+    Parameters
+    ----------
+    ar : float, array like
+        Arrival rate to the multi-server system.
+    sn : int, array like
+        Number of servers.
+    qs : str, array like of str or int, optional
+        Type(s) of queueing system: "MMC", "MDC", "MGC", "DMC", "DDC", "DGC",
+        "GMC", "GDC", "GGC". Defaults "GGC".
+        Examples of accepted formats: "mgc", "MGC", "m/g/c", "M/G/C"
+    sr : float, array like, optional
+        Single server service rate. Optional if s is given.
+    s : float, array like, optional
+        Mean service time in single server. Optional if sr is given.
+    va : float, array like, optional
+        Variance of inter-arrival time. Must be provided if "G" arrivals are present.
+    vs : float, array like, optional
+        Variance of service time. Must be provided if "G" service is present.
+
+    Returns
+    -------
+    result : dictionary of numpy arrays with such keys
+    'qs' - system codes (see qs_code)
+    'a'  - mean inter-arrival time
+    'va' - variance of inter-arrival time
+    'vs' - variance of service time
+    'ar', 'sn', 'sr', 's', 'u', 'pw', 'l', 'lq', 'w', 'wq', 'stable' - as in mmcqs
+
+    Example
+    -------
+    >>> result = ggcqs(ar=10, sn=5, qs="mdc", sr=4)
+    >>> print(result['wq'])
+    >>> 0.006518564872757617
+    """
+    code = qs_code(qs, servers="C")
+    result = mmcqs(ar, sn, sr=sr, s=s)
+    code_a = np.asarray(code) // 3
+    code_s = np.asarray(code) % 3
+    if va is None:
+        if np.any(code_a == 2):
+            raise Exception("Missing parameters. 'va' value is not provided")
+        va = np.nan
+    if vs is None:
+        if np.any(code_s == 2):
+            raise Exception("Missing parameters. 'vs' value is not provided")
+        vs = np.nan
+    ar = result["ar"]
+    s = result["s"]
+    with np.errstate(divide="ignore"):
+        a = np.where(ar == 0, np.inf, 1/ar)
+    code, code_a, code_s, a, s, va, vs = np.broadcast_arrays(
+        code, code_a, code_s, a, s, np.asarray(va, dtype=float), np.asarray(vs, dtype=float))
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        va = np.where(code_a == 0, a**2, np.where(code_a == 1, 0.0, va))
+        vs = np.where(code_s == 0, s**2, np.where(code_s == 1, 0.0, vs))
+        # Squared coefficients of variation (ca2 = 1 for Poisson arrivals, also when ar = 0)
+        ca2 = np.where(code_a == 0, 1.0, va/a**2)
+        cs2 = vs/s**2
+        stable = np.broadcast_to(result["stable"], code.shape) & (va >= 0) & (vs >= 0)
+        wq = np.where(stable, result["wq"]*(ca2 + cs2)/2, np.nan)
+        w = wq + s
+        lq = ar*wq
+        l = ar*w
+
+    for key in ("ar", "sn", "sr", "u", "pw"):
+        result[key] = np.broadcast_to(result[key], code.shape)
+    result.update({"qs": code, "a": a, "va": va, "s": s, "vs": vs,
+                   "l": l, "lq": lq, "w": w, "wq": wq})
+    result["stable"] = stable
+    return result
+# ==============================================================
+
+
 # ==============================================================
 # mssqsa function 
 # ==============================================================
@@ -329,7 +783,7 @@ def msqsa(ar, pl, sl):
     result = []
     for i in range(len(pl)):
         if pl[i]*ar < sl[i]["sr"]:
-            params = sl[i]
+            params = dict(sl[i])
             params['ar']=pl[i]*ar
             res = ssqs(**params)
                 
@@ -349,15 +803,386 @@ def msqsa(ar, pl, sl):
     return result
 # ==============================================================
 
-def msqs_ar_cr(sn,sr,w,qs='mm1'):
+
+# ==============================================================
+# msqsa_batch function
+# ==============================================================
+def msqsa_batch(ar, pl, qs="MM1", sr=None, s=None, vs=None, c=None, r=None, i=None,
+                frame=False):
+    """This function is the vectorized (struct-of-arrays) counterpart of the msqsa function.
+
+    The arrival rate is distributed between servers according to the probability
+    vector 'pl'. Each server is described by the elements of the parameter arrays
+    (instead of a list of dictionaries), so large heterogeneous server fleets are
+    evaluated in one pass. Unstable servers are reported in the 'stable' mask
+    and their queue metrics are set to NaN. The input arrays are not modified.
+
+    Parameters
+    ----------
+    ar : float, array like
+        Arrival rate to the multi-server system. An array of arrival rates of shape
+        (m, 1) gives results of shape (m, n) for n servers.
+    pl : float, array like
+        Probability distribution of the arrival rate between servers.
+    qs : str, array like of str or int, optional
+        Type(s) of queueing system of each server, e.g. "MD1", "MG1". Defaults "MM1".
+    sr : float, array like, optional
+        Service rates of servers. Optional if s is given.
+    s : float, array like, optional
+        Mean service times of servers. Optional if sr is given.
+    vs : float, array like, optional
+        Variances of service time. Must be provided only for "MG1" type servers.
+    c : float, array like, optional
+        Server costs.
+    r : float, array like, optional
+        The limit or maximum capacity of expendable resources of servers.
+    i : array like of str, optional
+        Info texts to describe the servers (only used if frame=True).
+    frame : bool, optional
+        If True, the flattened results are returned as one pandas DataFrame.
+
+    Returns
+    -------
+    result : dictionary of numpy arrays (or DataFrame if frame=True) with such keys
+    'qs', 'ar', 'sr', 'a', 'va', 's', 'vs', 'u', 'l', 'lq', 'wq', 'w', 'stable' - as in ssqs_batch
+    'p'  - probability of arrival rate distribution to the server
+    'c'  - cost (if 'c' is given)
+    'cu' - cost if it depends on utilization (if 'c' is given)
+    'r'  - amount of expendable resources of the server (if 'r' is given)
+    'rt' - time interval between refills of expendable resources (if 'r' is given)
+
+    Example
+    -------
+    >>> result = msqsa_batch(ar=1, pl=[0.4,0.6], qs=['md1','mg1'], sr=[1,1], vs=[0,0.1])
+    >>> print(result['w'])
+    >>> [1.33333333 1.825     ]
+    """
+    pl = np.asarray(pl, dtype=float)
+    ar = np.asarray(ar, dtype=float)
+    result = ssqs_batch(qs=qs, ar=pl*ar, sr=sr, s=s, vs=vs)
+    shape = result["w"].shape
+    result["p"] = np.broadcast_to(pl, shape)
+    if c is not None:
+        result["c"] = np.broadcast_to(np.asarray(c, dtype=float), shape)
+        result["cu"] = result["c"]*result["u"]
+    if r is not None:
+        result["r"] = np.broadcast_to(np.asarray(r, dtype=float), shape)
+        with np.errstate(divide="ignore"):
+            result["rt"] = np.where(result["stable"], result["r"]*result["s"]/result["u"], np.nan)
+
+    if frame:
+        import pandas as pd
+        names = np.char.add(np.array(QS_NAMES), "1")
+        columns = {key: np.ravel(np.broadcast_to(value, shape)) for key, value in result.items()}
+        columns["qs"] = names[columns["qs"]]
+        if i is not None:
+            columns["i"] = np.ravel(np.broadcast_to(np.asarray(i), shape))
+        return pd.DataFrame(columns)
+    return result
+# ==============================================================
+
+
+# ==============================================================
+# msqsa_opt function
+# ==============================================================
+def msqsa_opt(ar, qs="MM1", sr=None, s=None, vs=None, c=None, r=None, objective="w",
+              w_cr=None, tol=1e-12, maxiter=200, frame=False):
+    """This function finds the optimal distribution of the arrival rate between
+    heterogeneous servers and returns the resulting msqsa_batch metrics.
+
+    Servers with Poisson arrivals ("MM1", "MD1", "MG1") are supported. Two objectives
+    are available:
+    'w'    - minimize the mean response (total) time of the system. By the
+             Pollaczek-Khinchine formula the mean number of entities in every server
+             is convex in its arrival rate, so the optimum satisfies the KKT
+             conditions: all the loaded servers have equal marginal delay. The marginal
+             delay of each server is inverted in closed form and the Lagrange
+             multiplier is found by bisection (water-filling).
+    'cost' - minimize the utilization dependent cost sum(c*u) while the mean waiting
+             time of every loaded server does not exceed 'w_cr'. The cost is linear
+             in the arrival rate, so servers are filled in the order of cost per
+             request c*s up to their critical arrival rate.
+
+    Parameters
+    ----------
+    ar : float
+        Arrival rate to the multi-server system.
+    qs : str, array like of str or int, optional
+        Type(s) of queueing system of each server: "MM1", "MD1", "MG1". Defaults "MM1".
+    sr : float, array like, optional
+        Service rates of servers. Optional if s is given.
+    s : float, array like, optional
+        Mean service times of servers. Optional if sr is given.
+    vs : float, array like, optional
+        Variances of service time. Must be provided only for "MG1" type servers.
+    c : float, array like, optional
+        Server costs. Must be provided for the 'cost' objective.
+    r : float, array like, optional
+        The limit or maximum capacity of expendable resources of servers.
+    objective : str, optional
+        'w' or 'cost'. Defaults 'w'.
+    w_cr : float, optional
+        Critical mean waiting time in a server. Must be provided for the 'cost' objective.
+    tol : float, optional
+        Relative tolerance of the Lagrange multiplier. Defaults 1e-12.
+    maxiter : int, optional
+        Maximum number of bisection steps. Defaults 200.
+    frame : bool, optional
+        If True, the results are returned as one pandas DataFrame.
+
+    Returns
+    -------
+    result : dictionary of numpy arrays (or DataFrame) as in msqsa_batch. The optimal
+        probability distribution of the arrival rate is given by the key 'p'. If ar
+        is 0, the distribution is even and the load dependent metrics are zero.
+
+    Example
+    -------
+    >>> result = msqsa_opt(ar=1.5, qs="mm1", sr=[1,2])
+    >>> print(result['p'])
+    >>> [0.2524531 0.7475469]
+    """
+    if (sr is None) and (s is None):
+        raise Exception("Missing parameters: sr or s must be given.")
+    if s is None:
+        s = 1/np.asarray(sr, dtype=float)
+    code = qs_code(qs)
+    if np.any(np.asarray(code)//3 != 0):
+        raise Exception('Wrong system type: only "MM1", "MD1", "MG1" are valid')
+    if vs is None:
+        if np.any(np.asarray(code) == 2):
+            raise Exception("Missing parameters. 'vs' value is not provided")
+        vs = np.nan
+    code, s, vs = np.broadcast_arrays(code, np.asarray(s, dtype=float), np.asarray(vs, dtype=float))
+    s = np.ravel(s)
+    vs = np.ravel(np.where(code == 0, s**2, np.where(code == 1, 0.0, vs)))
+    # P-K: wq = x*k/(1 - x*s), where x - arrival rate to the server
+    k = (s**2 + vs)/2
+    if ar >= np.sum(1/s):
+        raise Exception("Unstable system: ar must be < sum(sr)")
+
+    if objective == "w":
+        def load(nu):
+            # Inverse of the marginal delay d(x*w(x))/dx = s + k/s*(1/y^2 - 1), y = 1 - x*s
+            with np.errstate(invalid="ignore"):
+                y = 1/np.sqrt(1 + np.maximum(nu - s, 0)*s/k)
+            return (1 - y)/s
+
+        lo = np.min(s)
+        hi = 2*np.max(s)
+        while np.sum(load(hi)) < ar:
+            hi *= 2
+        for _ in range(maxiter):
+            if hi - lo <= tol*hi:
+                break
+            mid = (lo + hi)/2
+            if np.sum(load(mid)) < ar:
+                lo = mid
+            else:
+                hi = mid
+        x = load(hi)
+        x *= ar/np.sum(x)
+    elif objective == "cost":
+        if c is None or w_cr is None:
+            raise Exception("Missing parameters: 'c' and 'w_cr' must be given for 'cost' objective.")
+        c = np.ravel(np.broadcast_to(np.asarray(c, dtype=float), s.shape))
+        # Critical arrival rate of every server (wq = w_cr - s)
+        wq_cr = np.maximum(w_cr - s, 0)
+        x_max = wq_cr/(k + wq_cr*s)
+        if np.sum(x_max) < ar:
+            raise Exception("Infeasible system: 'w_cr' can not be ensured for given 'ar'")
+        order = np.argsort(c*s, kind="stable")
+        filled = np.cumsum(x_max[order]) - x_max[order]
+        x = np.empty_like(s)
+        x[order] = np.clip(ar - filled, 0, x_max[order])
+    else:
+        raise Exception("Wrong objective: only 'w' and 'cost' are valid")
+
+    if ar > 0:
+        pl = x/ar
+    else:
+        # No load: any split is optimal, the arrival rate is split evenly
+        pl = np.full(s.shape, 1/s.size)
+    return msqsa_batch(ar=ar, pl=pl, qs=code, s=s, vs=vs, c=c, r=r, frame=frame)
+# ==============================================================
+
+
+# ==============================================================
+# Prepared queueing system models
+# ==============================================================
+class QueueResult:
+    """Lightweight record of queueing system parameters returned by QueueModel.evaluate.
+
+    The attributes have the same meaning as the keys of the ssqs result dictionary.
+    For array inputs the attributes are numpy arrays and 'stable' is a boolean mask.
+    """
+    __slots__ = ("qs", "ar", "sr", "a", "va", "s", "vs", "u", "l", "lq", "wq", "w",
+                 "sn", "stable")
+
+    def __init__(self, qs, ar, sr, a, va, s, vs, u, l, lq, wq, w, sn, stable):
+        self.qs = qs
+        self.ar = ar
+        self.sr = sr
+        self.a = a
+        self.va = va
+        self.s = s
+        self.vs = vs
+        self.u = u
+        self.l = l
+        self.lq = lq
+        self.wq = wq
+        self.w = w
+        self.sn = sn
+        self.stable = stable
+
+    def as_dict(self):
+        """Returns the parameters as a dictionary (the same keys as ssqs/msqs results)."""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self):
+        return "QueueResult(%s)" % ", ".join("%s=%s" % (key, getattr(self, key))
+                                             for key in self.__slots__)
+
+
+class QueueModel:
+    """Prepared single-server or multi-server (msqs) queueing system model.
+
+    The system notation and the service parameters are parsed and verified once,
+    when the model is created. The evaluate method then only performs the arithmetic
+    for the given arrival rate, which makes the model suitable for hot loops where
+    the same system is evaluated many times.
+
+    Parameters
+    ----------
+    qs : str, optional
+        Type of queueing system: "MM1", "MD1", "MG1", "DM1", "DD1", "DG1", "GM1",
+        "GD1", "GG1". Defaults "MM1".
+    sr : float, optional
+        Service rate of a server. Optional if s is given.
+    s : float, optional
+        Mean service time of a server. Optional if sr is given.
+    va : float, optional
+        Variance of inter-arrival time. Must be provided only for "G" arrivals.
+    vs : float, optional
+        Variance of service time. Must be provided only for "G" service.
+    sn : int, optional
+        Number of servers. The arrival rate is evenly distributed among the servers
+        as in msqs. Defaults 1.
+    decimals : int or None, optional
+        Rounding of results as in ssqs. Defaults 14. None skips the rounding.
+
+    Example
+    -------
+    >>> model = QueueModel(qs="md1", s=0.05)
+    >>> print(model.evaluate(10).w, model.evaluate(np.array([10,15])).w)
+    >>> 0.075 [0.075 0.125]
+    """
+    __slots__ = ("qs", "code", "sr", "s", "va", "vs", "sn", "decimals")
+
+    def __init__(self, qs="MM1", sr=None, s=None, va=None, vs=None, sn=1, decimals=14):
+        if qs is None:
+            qs = "mm1"
+        code = qs_code(qs)
+        if not isinstance(code, int):
+            raise Exception("Wrong system type: QueueModel describes one system type")
+        if (sr is None) and (s is None):
+            raise Exception("Missing parameters. 'sr' or 's' values are not provided")
+        if s is None:
+            s = float("inf") if sr == 0 else 1/sr
+        if code//3 == 2 and va is None:
+            raise Exception("Missing parameters. 'va' value is not provided")
+        if code % 3 == 2 and vs is None:
+            raise Exception("Missing parameters. 'vs' value is not provided")
+        if code//3 == 2 and sn != 1:
+            raise Exception('Wrong system type: "G" arrivals are valid only for a single server')
+        if code % 3 == 0:
+            vs = s**2
+        elif code % 3 == 1:
+            vs = 0
+        if s < 0 or (vs is not None and vs < 0) or (va is not None and va < 0):
+            raise Exception("Negative parameters. Ensure that 's', 'va' and 'vs' > 0")
+        self.qs = qs
+        self.code = code
+        self.s = float(s)
+        self.sr = float("inf") if s == 0 else 1/s
+        self.va = va
+        self.vs = vs
+        self.sn = sn
+        self.decimals = decimals
+
+    def evaluate(self, ar):
+        """Calculates the system parameters for the arrival rate 'ar'.
+
+        For a scalar arrival rate an exception is raised if the system is unstable
+        (as in ssqs). For arrays the unstable points are reported by the 'stable'
+        mask of the result and their queue metrics are NaN.
+
+        Parameters
+        ----------
+        ar : float, array like
+            Arrival rate to the system (to all 'sn' servers).
+
+        Returns
+        -------
+        result : QueueResult
+        """
+        if isinstance(ar, (int, float)) or np.ndim(ar) == 0:
+            return self._evaluate_scalar(float(ar))
+        ar = np.asarray(ar, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ar1 = ar/self.sn if self.sn > 0 else np.where(ar == 0, 0.0, np.inf)
+        result = ssqs_batch(qs=self.code, ar=ar1, s=self.s, va=self.va, vs=self.vs,
+                            decimals=self.decimals)
+        return QueueResult(self.qs, ar, result["sr"], result["a"],
+                           result["va"], result["s"], result["vs"], result["u"],
+                           result["l"], result["lq"], result["wq"], result["w"],
+                           self.sn, result["stable"])
+
+    def _evaluate_scalar(self, ar):
+        s = self.s
+        vs = self.vs
+        ar1 = ar/self.sn if self.sn > 0 else (0.0 if ar == 0 else float("inf"))
+        a = float("inf") if ar1 == 0 else 1/ar1
+        if s >= a or a < 0:
+            raise Exception("Unstable system. Ensure that: 's' < 'a' or 'ar' < 'sr'")
+        code_a = self.code//3
+        va = a**2 if code_a == 0 else (0 if code_a == 1 else self.va)
+        # The same order of operations as in ssqs
+        ar1 = 1/a
+        u = ar1/self.sr
+        if ar1 == 0:
+            wq = 0.0
+        elif self.code == 0:
+            wq = (u*s)/(1 - u)
+        elif self.code == 1:
+            wq = (u*s)/(2*(1 - u))
+        else:
+            # Marshall's approximation
+            wq = (u*s)/(2*(1 - u))*((va + vs)/(s**2))*((s**2 + vs)/(a**2 + vs))
+        w = wq + s
+        l = ar1*w
+        lq = ar1*wq
+        values = [ar1, self.sr, a, va, s, vs, u, l, lq, wq, w]
+        d = self.decimals
+        if d is not None:
+            values = [round(v, d) for v in values]
+        ar1, sr, a, va, s, vs, u, l, lq, wq, w = values
+        return QueueResult(self.qs, ar, sr, a, va, s, vs, u, l, lq, wq, w, self.sn, True)
+# ==============================================================
+
+def msqs_ar_cr(sn,sr,w,qs='mm1',va=None,vs=None):
     # if w < 1/sr:
     #     return -1
-    if qs == 'mm1':
+    qs_f = qs.replace("/", "").lower()
+    if qs_f == 'mm1':
         ar_cr = sn*(w*sr-1)/w
         return ar_cr
-    if qs == 'md1':
+    if qs_f == 'md1':
         ar_cr = sn*2*sr*(w*sr-1)/(2*w*sr-1)
         return ar_cr
+    # No closed form for other systems: numerical solution ('va', 'vs' - variances
+    # of inter-arrival and service times, as in qs_ar_cr)
+    return qs_ar_cr(w=w, sn=sn, sr=sr, qs=qs, va=va, vs=vs)
 
 def msqs_ar_cr2(sn,sr,w,qs='mm1'):
     if qs == 'mm1':
@@ -367,12 +1192,456 @@ def msqs_ar_cr2(sn,sr,w,qs='mm1'):
         ar_cr = (sn+1)*2*sr*(w*sr-1)/(2*w*sr-1)
         return ar_cr
 
-def msqs_sn_cr(ar,sr,w,qs='mm1'):
+def msqs_sn_cr(ar,sr,w,qs='mm1',va=None,vs=None):
     # if w < 1/sr:
     #     return -1
-    if qs == 'mm1':
+    qs_f = qs.replace("/", "").lower()
+    if qs_f == 'mm1':
         sn_cr = np.ceil(ar*w/(sr*w-1))
         return sn_cr
-    if qs == 'md1':
+    if qs_f == 'md1':
         sn_cr = np.ceil(ar*(2*w*sr-1)/(2*sr*(w*sr-1)))
         return sn_cr
+    # No closed form for other systems: numerical solution ('va', 'vs' - variances
+    # of inter-arrival and service times, as in qs_sn_cr)
+    return qs_sn_cr(ar=ar, w=w, sr=sr, qs=qs, va=va, vs=vs)
+
+
+# ==============================================================
+# Inverse (critical value) solvers
+# ==============================================================
+def qs_metric(qs, ar, sn, s, va=None, vs=None, metric="w"):
+    """This function evaluates a performance metric of a multi-server queueing system.
+
+    It is the forward model used by the inverse solvers (qs_ar_cr, qs_sn_cr, qs_s_cr).
+    Notations ending with "1" are evaluated by msqs_batch (the arrival rate is split
+    among independent servers), notations ending with "C" by ggcqs (pooled servers).
+    Systems with "G" arrivals ("GM1", "GD1", "GG1") are evaluated by ssqs_batch and
+    only with sn=1, as the split of a general arrival process is not modeled.
+
+    Parameters
+    ----------
+    qs : str
+        Type of queueing system, e.g. "MD1", "MG1", "MMC", "GGC".
+    ar, sn, s, va, vs : float, array like
+        Arrival rate, number of servers, mean service time in single server,
+        variances of inter-arrival and service times.
+    metric : str, optional
+        'w' - mean waiting (total time) in system, 'wq' - mean waiting time in queue.
+        Defaults 'w'.
+
+    Returns
+    -------
+    value : numpy.ndarray
+        The metric value, NaN where the system is unstable.
+    """
+    if metric not in ("w", "wq"):
+        raise Exception("Wrong metric: only 'w' and 'wq' are valid")
+    return _qs_evaluate(qs.replace("/", "").upper(), ar, sn, s, va, vs)[metric]
+
+
+def _qs_evaluate(qs_f, ar, sn, s, va, vs):
+    """Evaluates the system as in qs_metric: pooled "C" systems by ggcqs, single
+    server systems with "G" arrivals by ssqs_batch and other "1" systems by msqs_batch."""
+    if qs_f[2] == "C":
+        return ggcqs(ar, sn, qs=qs_f, s=s, va=va, vs=vs)
+    if qs_f[0] == "G":
+        if np.any(np.asarray(sn) != 1):
+            raise Exception('Wrong system type: "G" arrivals are only supported with sn=1 '
+                            '(the split of a general arrival process among servers is not modeled)')
+        return ssqs_batch(qs=qs_f, ar=ar, s=s, va=va, vs=vs)
+    return msqs_batch(ar, sn, qs=qs_f, s1=s, vs=vs)
+
+
+def _target_met(qs, ar, sn, s, va, vs, w, metric, p):
+    """True where the mean (p=None) or the p-quantile of the metric does not exceed w."""
+    with np.errstate(invalid="ignore"):
+        if p is None:
+            return qs_metric(qs, ar, sn, s, va, vs, metric) <= w
+        return qs_wait_cdf(w, qs=qs, ar=ar, sn=sn, s=s, va=va, vs=vs, metric=metric) >= p
+
+
+def _bisect_max(f, lo, hi, tol, maxiter):
+    """Largest x in [lo, hi) with f(x) feasible for increasing metrics (vectorized bisection).
+    The returned bound is always on the feasible side of the bracket."""
+    for _ in range(maxiter):
+        if not np.any(hi - lo > tol):
+            break
+        mid = (lo + hi)/2
+        ok = f(mid)
+        lo = np.where(ok, mid, lo)
+        hi = np.where(ok, hi, mid)
+    return lo
+
+
+def qs_ar_cr(w, sn, qs="mm1", sr=None, s=None, va=None, vs=None, metric="w", p=None,
+             tol=1e-9, maxiter=200):
+    """This function finds the critical (maximum) arrival rate of a multi-server system,
+    for which the mean waiting time does not exceed the critical value 'w'.
+
+    The solution is found for arrays of targets and systems at once by vectorized
+    bisection, which works with every system type supported by qs_metric (msqs_batch,
+    ssqs_batch for "G" arrivals with sn=1, and ggcqs). The returned arrival rate is
+    guaranteed to satisfy the target and to be within 'tol' (relative to the
+    stability limit sn*sr) of the exact critical value.
+
+    Parameters
+    ----------
+    w : float, array like
+        Critical value of the metric.
+    sn : int, array like
+        Number of servers.
+    qs : str, optional
+        Type of queueing system, e.g. "MM1", "MD1", "MG1", "MMC", "MGC", "GGC".
+        Defaults "mm1".
+    sr : float, array like, optional
+        Single server service rate. Optional if s is given.
+    s : float, array like, optional
+        Mean service time in single server. Optional if sr is given.
+    va, vs : float, array like, optional
+        Variances of inter-arrival and service times (for "G" systems).
+    metric : str, optional
+        'w' or 'wq' (see qs_metric). Defaults 'w'.
+    p : float, optional
+        If given, the p-quantile of the waiting time (e.g. 0.95) must not exceed 'w'
+        instead of the mean (see qs_wait_cdf).
+    tol : float, optional
+        Relative tolerance of the solution. Defaults 1e-9.
+    maxiter : int, optional
+        Maximum number of bisection steps. Defaults 200.
+
+    Returns
+    -------
+    ar_cr : numpy.ndarray
+        Critical arrival rate. NaN if the target can not be reached even at
+        zero arrival rate.
+
+    Example
+    -------
+    >>> qs_ar_cr(w=300/3600, sn=10, s=100/3600, qs="mg1", vs=(50/3600)**2)
+    >>> 274.2857140302658
+    """
+    if (sr is None) and (s is None):
+        raise Exception("Missing parameters: sr or s must be given.")
+    if s is None:
+        s = 1/np.asarray(sr, dtype=float)
+    w, sn, s = np.broadcast_arrays(np.asarray(w, dtype=float),
+                                   np.asarray(sn, dtype=float), np.asarray(s, dtype=float))
+
+    def feasible(ar):
+        return _target_met(qs, ar, sn, s, va, vs, w, metric, p)
+
+    hi = sn/s
+    ar_cr = _bisect_max(feasible, np.zeros(hi.shape), hi, tol*hi, maxiter)
+    return np.where(feasible(np.zeros(hi.shape)), ar_cr, np.nan)
+
+
+def qs_sn_cr(ar, w, qs="mm1", sr=None, s=None, va=None, vs=None, metric="w", p=None,
+             sn_max=2**40):
+    """This function finds the minimum number of servers of a multi-server system,
+    for which the mean waiting time does not exceed the critical value 'w'.
+
+    The solution is found for arrays of targets and systems at once by vectorized
+    integer bisection, which works with every system type supported by qs_metric
+    (systems with "G" arrivals and "1" notation can not be split among servers, so
+    they are rejected).
+
+    Parameters
+    ----------
+    ar : float, array like
+        Arrival rate to the multi-server system.
+    w : float, array like
+        Critical value of the metric.
+    qs, sr, s, va, vs, metric, p : optional
+        See qs_ar_cr.
+    sn_max : int, optional
+        Upper limit for the number of servers. Defaults 2**40.
+
+    Returns
+    -------
+    sn_cr : numpy.ndarray
+        Minimum number of servers. NaN if the target can not be reached
+        with sn_max servers.
+
+    Example
+    -------
+    >>> qs_sn_cr(ar=1000, w=240/3600, s=100/3600, qs="md1")
+    >>> 38.0
+    """
+    if (sr is None) and (s is None):
+        raise Exception("Missing parameters: sr or s must be given.")
+    if s is None:
+        s = 1/np.asarray(sr, dtype=float)
+    qs_f = qs.replace("/", "").upper()
+    if qs_f[0] == "G" and qs_f[2] == "1":
+        raise Exception('Wrong system type: "G" arrivals are only supported with sn=1 '
+                        '(the split of a general arrival process among servers is not modeled)')
+    ar, w, s = np.broadcast_arrays(np.asarray(ar, dtype=float),
+                                   np.asarray(w, dtype=float), np.asarray(s, dtype=float))
+
+    def feasible(sn):
+        return _target_met(qs, ar, sn, s, va, vs, w, metric, p)
+
+    # The lowest number of servers of a stable system
+    lo = np.where(ar > 0, np.floor(ar*s) + 1, 1.0)
+    hi = lo.copy()
+    # Doubling until the target is reached
+    ok = feasible(hi)
+    while not np.all(ok) and np.max(hi[~ok]) < sn_max:
+        hi = np.where(ok, hi, np.minimum(2*hi, sn_max))
+        ok = feasible(hi)
+    # Integer bisection in [lo, hi]
+    while np.any(hi > lo):
+        mid = np.floor((lo + hi)/2)
+        ok_mid = feasible(mid)
+        hi = np.where(ok_mid, mid, hi)
+        lo = np.where(ok_mid, lo, mid + 1)
+    return np.where(ok, hi, np.nan)
+
+
+def qs_s_cr(ar, sn, w, qs="mm1", va=None, vs=None, metric="w", p=None, tol=1e-9,
+            maxiter=200):
+    """This function finds the critical (maximum) mean service time of a single server
+    in a multi-server system, for which the mean waiting time does not exceed the
+    critical value 'w'.
+
+    The solution is found for arrays of targets and systems at once by vectorized
+    bisection. The variance of service time 'vs' (for "G" service) is kept fixed.
+
+    Parameters
+    ----------
+    ar : float, array like
+        Arrival rate to the multi-server system.
+    sn : int, array like
+        Number of servers.
+    w : float, array like
+        Critical value of the metric.
+    qs, va, vs, metric, p, maxiter : optional
+        See qs_ar_cr.
+    tol : float, optional
+        Relative tolerance of the solution (relative to the initial bracket).
+        Defaults 1e-9.
+
+    Returns
+    -------
+    s_cr : numpy.ndarray
+        Critical mean service time. Infinite if the target is always met
+        (e.g. 'wq' at zero arrival rate).
+
+    Example
+    -------
+    >>> qs_s_cr(ar=1000, sn=10, w=240/3600, qs="md1")
+    >>> 0.009254171941429377
+    """
+    ar, sn, w = np.broadcast_arrays(np.asarray(ar, dtype=float),
+                                    np.asarray(sn, dtype=float), np.asarray(w, dtype=float))
+
+    def feasible(s):
+        return _target_met(qs, ar, sn, s, va, vs, w, metric, p)
+
+    with np.errstate(divide="ignore"):
+        hi = np.where(ar > 0, sn/ar, np.inf)
+    if metric == "w":
+        # The waiting time in system is not shorter than the service time
+        hi = np.minimum(hi, w if p is None else w*max(1, -1/np.log(1 - p)))
+    s_cr = _bisect_max(feasible, np.zeros(hi.shape), hi, tol*hi, maxiter)
+    return np.where(np.isinf(hi), np.inf, s_cr)
+# ==============================================================
+
+
+# ==============================================================
+# Waiting time distributions
+# ==============================================================
+def _md1_wq_tail(t, ar, s):
+    """P(Wq > t) of the M/D/1 system.
+
+    Erlang's (Crommelin's) series is used for t < 10*s. The series alternates and
+    loses precision for longer times, where the exponential asymptote
+    c0*exp(-theta*t) of the Cramer-Lundberg type is used (theta is the positive
+    root of ar*(exp(theta*s) - 1) = theta). Both agree within ~1e-10 at the switch.
+    """
+    t, ar, s = np.broadcast_arrays(np.asarray(t, dtype=float), np.asarray(ar, dtype=float),
+                                   np.asarray(s, dtype=float))
+    rho = ar*s
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        tau = np.maximum(t, 0)/s
+        use_series = tau < 10
+        # Erlang's series: P(Wq <= t) = (1-rho)*sum_k (rho*(k - tau))^k/k! * exp(-rho*(k - tau))
+        total = np.zeros(t.shape)
+        for k in range(10):
+            x = rho*(k - tau)
+            term = np.where(k <= tau, x**k/special.factorial(k)*np.exp(-x), 0.0)
+            total = total + np.where(use_series, term, 0.0)
+        tail_series = 1 - (1 - rho)*total
+        # Exponential asymptote: x = theta*s solves rho*(exp(x) - 1) = x (Newton from the right)
+        x = np.minimum(2*(1 - rho)/rho, 50.0)
+        for _ in range(60):
+            x = x - (rho*np.expm1(x) - x)/(rho*np.exp(x) - 1)
+        c0 = (1 - rho)/(rho*np.exp(x) - 1)
+        tail_asym = c0*np.exp(-x*tau)
+    tail = np.where(use_series, tail_series, tail_asym)
+    tail = np.where(rho == 0, 0.0, tail)
+    return np.clip(np.where(t < 0, 1.0, tail), 0, 1)
+
+
+def qs_wait_cdf(t, qs="mm1", ar=None, sn=1, sr=None, s=None, va=None, vs=None, metric="w"):
+    """This function calculates the cumulative distribution function of the waiting time
+    P(W <= t) (or P(Wq <= t) in queue) of queueing systems.
+
+    The systems are described as in qs_metric: notations ending with "1" are evaluated
+    as 'sn' independent single-server queues with evenly split arrival rate (msqs),
+    notations ending with "C" as 'sn' pooled servers with one queue (ggcqs). Systems
+    with "G" arrivals and "1" notation are supported only with sn=1.
+    All the inputs are broadcast against each other, so the distribution can be
+    evaluated for arrays of times and arrays of system configurations at once,
+    e.g. t[:, None] and ar[None, :].
+
+    The waiting time in queue is:
+    - exact for "MM1" and "MMC": P(Wq > t) = pw*exp(-(sn*sr - ar)*t),
+    - exact for "MD1" (Erlang's series with exponential asymptote for long times),
+    - for other systems approximated by the atom at zero and the exponential tail
+      with the same mean: P(Wq > t) = pw*exp(-pw*t/wq), where pw is the probability
+      of waiting (pw = u for single server systems, exact for M/G/1, and Erlang-C
+      for pooled servers).
+    The waiting time in system W = Wq + S is obtained by convolution with the
+    exponential service time for "M" service (exact for "MM1" and "MMC") and by
+    shifting Wq by the service time for "D" service. For "G" service the same shift
+    is used as an approximation.
+
+    Parameters
+    ----------
+    t : float, array like
+        Time.
+    qs : str, optional
+        Type of queueing system, e.g. "MM1", "MD1", "MG1", "GG1", "MMC", "GGC".
+        Defaults "mm1".
+    ar : float, array like
+        Arrival rate to the (multi-server) system.
+    sn : int, array like, optional
+        Number of servers. Defaults 1.
+    sr : float, array like, optional
+        Single server service rate. Optional if s is given.
+    s : float, array like, optional
+        Mean service time in single server. Optional if sr is given.
+    va, vs : float, array like, optional
+        Variances of inter-arrival and service times (for "G" systems).
+    metric : str, optional
+        'w' - waiting (total time) in system, 'wq' - waiting time in queue.
+        Defaults 'w'.
+
+    Returns
+    -------
+    cdf : numpy.ndarray
+        P(W <= t) or P(Wq <= t). NaN where the system is unstable.
+
+    Example
+    -------
+    >>> qs_wait_cdf(t=[0.1, 0.5], qs="mm1", ar=5, sr=10)
+    >>> [0.39346934 0.917915  ]
+    """
+    if metric not in ("w", "wq"):
+        raise Exception("Wrong metric: only 'w' and 'wq' are valid")
+    if ar is None:
+        raise Exception("Missing parameters. 'ar' value is not provided")
+    if (sr is None) and (s is None):
+        raise Exception("Missing parameters: sr or s must be given.")
+    if s is None:
+        s = 1/np.asarray(sr, dtype=float)
+    qs_f = qs.replace("/", "").upper()
+    if qs_f[2] == "C":
+        result = ggcqs(ar, sn, qs=qs_f, s=s, va=va, vs=vs)
+        pw = result["pw"]
+        ar1 = result["ar"]
+    else:
+        result = _qs_evaluate(qs_f, ar, sn, s, va, vs)
+        pw = result["u"]
+        ar1 = result["ar1"] if "ar1" in result else result["ar"]
+    t = np.asarray(t, dtype=float)
+    s = result["s"]
+    wq = result["wq"]
+
+    def wq_tail(x):
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            tail = np.where(pw > 0, pw*np.exp(-pw*np.maximum(x, 0)/wq), 0.0)
+        if qs_f == "MD1":
+            tail = _md1_wq_tail(x, ar1, s)
+        return np.where(x < 0, 1.0, tail)
+
+    if metric == "wq":
+        tail = wq_tail(t)
+    elif qs_f[1] == "M":
+        # W = Wq + S, S - exponential: mixture of exp(mu) and hypoexponential(gamma, mu)
+        mu = 1/s
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            gamma = pw/wq
+            tp = np.maximum(t, 0)
+            hypo = (mu*np.exp(-gamma*tp) - gamma*np.exp(-mu*tp))/(mu - gamma)
+            hypo = np.where(np.abs(mu - gamma) > 1e-9*mu, hypo, (1 + mu*tp)*np.exp(-mu*tp))
+            tail = (1 - pw)*np.exp(-mu*tp) + np.where(pw > 0, pw*hypo, 0.0)
+    else:
+        tail = wq_tail(t - s)
+    cdf = 1 - np.clip(tail, 0, 1)
+    return np.where(np.broadcast_to(result["stable"], cdf.shape), cdf, np.nan)
+
+
+def qs_wait_quantile(p, qs="mm1", ar=None, sn=1, sr=None, s=None, va=None, vs=None,
+                     metric="w", tol=1e-10, maxiter=200):
+    """This function calculates the p-quantile (e.g. p95, p99) of the waiting time
+    in system (or in queue) of queueing systems.
+
+    The quantile is obtained by vectorized bisection of the distribution function
+    qs_wait_cdf (see it for the supported systems and approximations), so arrays of
+    probabilities and system configurations are evaluated at once.
+
+    Parameters
+    ----------
+    p : float, array like
+        Probability level, 0 <= p < 1.
+    qs, ar, sn, sr, s, va, vs, metric : optional
+        See qs_wait_cdf.
+    tol : float, optional
+        Relative tolerance of the quantile. Defaults 1e-10.
+    maxiter : int, optional
+        Maximum number of bisection steps. Defaults 200.
+
+    Returns
+    -------
+    tp : numpy.ndarray
+        The p-quantile of the waiting time. NaN where the system is unstable.
+
+    Example
+    -------
+    >>> qs_wait_quantile(p=[0.95, 0.99], qs="mm1", ar=5, sr=10)
+    >>> [0.59914645 0.92103404]
+    """
+    if (sr is None) and (s is None):
+        raise Exception("Missing parameters: sr or s must be given.")
+    if s is None:
+        s = 1/np.asarray(sr, dtype=float)
+    p = np.asarray(p, dtype=float)
+    if np.any((p < 0) | (p >= 1)):
+        raise Exception("Wrong parameter: p must be in range [0, 1)")
+
+    def cdf(t):
+        return qs_wait_cdf(t, qs=qs, ar=ar, sn=sn, s=s, va=va, vs=vs, metric=metric)
+
+    mean = qs_metric(qs, ar, sn, s, va, vs, metric="w")
+    stable = np.isfinite(mean)
+    p, mean = np.broadcast_arrays(p, np.where(stable, mean, 1.0))
+    lo = np.zeros(p.shape)
+    hi = np.array(mean, dtype=float)
+    # Doubling until the bracket contains the quantile
+    for _ in range(maxiter):
+        below = cdf(hi) < p
+        if not np.any(below & np.broadcast_to(stable, p.shape)):
+            break
+        hi = np.where(below, 2*hi, hi)
+    for _ in range(maxiter):
+        if not np.any(hi - lo > tol*hi):
+            break
+        mid = (lo + hi)/2
+        ok = cdf(mid) >= p
+        hi = np.where(ok, mid, hi)
+        lo = np.where(ok, lo, mid)
+    return np.where(np.broadcast_to(stable, p.shape), hi, np.nan)
+# ==============================================================
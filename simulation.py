@@ -0,0 +1,566 @@
+#
+#   Simulation of queueing systems
+#
+#   The simulation models are driven by the same parameters as the
+#   analytical ssqs, msqs and ggcqs functions, so the analytical results
+#   can be validated without external (MATLAB SimEvents) models.
+#
+#   Author: Paulius Tervydis
+#   Date: 2026-10-18
+#
+# ==============================================================
+import heapq
+import numpy as np
+from qsystems import qs_code
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# ==============================================================
+# Random inter-arrival and service times
+# ==============================================================
+def sample_times(distr, mean, var, size, rng):
+    """This function generates random times with the given distribution type.
+
+    Parameters
+    ----------
+    distr : str
+        Distribution type according Kendall's notations: "M" - exponential,
+        "D" - deterministic, "G" - general (gamma distribution with the given
+        mean and variance; deterministic if var = 0).
+    mean : float
+        Mean time.
+    var : float
+        Variance of time. Used only for "G" distribution.
+    size : int or tuple
+        Number (shape) of generated times.
+    rng : numpy.random.Generator
+        Random number generator.
+
+    Returns
+    -------
+    times : numpy.ndarray
+    """
+    if distr == "M":
+        return rng.exponential(mean, size)
+    if distr == "D" or (distr == "G" and var == 0):
+        return np.full(size, float(mean))
+    if distr == "G":
+        if var is None or var < 0:
+            raise Exception("Missing parameters. Variance of 'G' distribution is not provided")
+        return rng.gamma(mean**2/var, var/mean, size)
+    raise Exception("Incompatible distribution type: %s" % distr)
+
+
+def lindley(a, s, backend=None):
+    """This function calculates waiting times in queue of a single-server FIFO system
+    by Lindley's recursion Wq[k] = max(0, Wq[k-1] + s[k-1] - a[k]).
+
+    The recursion is solved without a Python loop: Wq = X - cummin(X), where X is
+    the cumulative sum of s[k-1] - a[k] (with X[0] = 0). The last axis is the
+    customer axis, so several independent servers can be simulated at once.
+
+    Parameters
+    ----------
+    a : numpy.ndarray
+        Inter-arrival times (a[k] - time between arrivals of customers k-1 and k;
+        a[0] is not used).
+    s : numpy.ndarray
+        Service times.
+    backend : str, optional
+        "numba" - JIT-compiled loop, "numpy" - vectorized NumPy. Both give identical
+        results. Defaults "numba" if numba is installed, otherwise "numpy".
+
+    Returns
+    -------
+    wq : numpy.ndarray
+        Waiting times in queue of the customers.
+    """
+    if _backend(backend) == "numba":
+        a, s = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(s, dtype=float))
+        shape = a.shape
+        a = np.ascontiguousarray(a).reshape(-1, shape[-1])
+        s = np.ascontiguousarray(s).reshape(-1, shape[-1])
+        wq = np.empty(a.shape)
+        _lindley_loop(a, s, wq)
+        return wq.reshape(shape)
+    x = np.zeros(np.broadcast_shapes(np.shape(a), np.shape(s)))
+    np.cumsum(s[..., :-1] - a[..., 1:], axis=-1, out=x[..., 1:])
+    return x - np.minimum.accumulate(x, axis=-1)
+
+
+def ggc_wait(a, s, sn, backend=None):
+    """This function calculates waiting times in queue of a FIFO system with 'sn'
+    pooled servers (one common queue).
+
+    A compact event engine is used: only the times when the servers become free are
+    kept in a heap, and every arrival is served by the earliest free server.
+
+    Parameters
+    ----------
+    a : numpy.ndarray
+        Inter-arrival times.
+    s : numpy.ndarray
+        Service times.
+    sn : int
+        Number of servers.
+    backend : str, optional
+        "numba" - JIT-compiled loop, "numpy" - Python loop with heapq. Both give
+        identical results. Defaults "numba" if numba is installed, otherwise "numpy".
+
+    Returns
+    -------
+    wq : numpy.ndarray
+        Waiting times in queue of the customers.
+    """
+    if _backend(backend) == "numba":
+        wq = np.empty(len(a))
+        _ggc_loop(np.ascontiguousarray(a, dtype=float), np.ascontiguousarray(s, dtype=float), int(sn), wq)
+        return wq
+    n = len(a)
+    wq = np.empty(n)
+    free = [0.0]*int(sn)
+    t = 0.0
+    i = 0
+    for ai, si in zip(a.tolist(), s.tolist()):
+        t += ai
+        f = free[0]
+        if f > t:
+            wq[i] = f - t
+            heapq.heapreplace(free, f + si)
+        else:
+            wq[i] = 0.0
+            heapq.heapreplace(free, t + si)
+        i += 1
+    return wq
+# ==============================================================
+
+
+# ==============================================================
+# JIT-compiled kernels (used if numba is installed)
+# ==============================================================
+def _backend(backend):
+    """Returns the simulation kernels backend: "numba" or "numpy"."""
+    if backend is None:
+        return "numpy" if numba is None else "numba"
+    if backend not in ("numba", "numpy"):
+        raise Exception("Wrong backend: only 'numba' and 'numpy' are valid")
+    if backend == "numba" and numba is None:
+        raise Exception("Backend 'numba' is not available: numba is not installed")
+    return backend
+
+
+def _lindley_loop(a, s, wq):
+    """Lindley's recursion of the rows of 2-D arrays. The operations are done in the
+    same order as by the NumPy cumsum/cummin solution, so the results are identical."""
+    for r in range(a.shape[0]):
+        x = 0.0
+        m = 0.0
+        wq[r, 0] = 0.0
+        for k in range(1, a.shape[1]):
+            x += s[r, k - 1] - a[r, k]
+            if x < m:
+                m = x
+            wq[r, k] = x - m
+
+
+def _ggc_loop(a, s, sn, wq):
+    """Event engine of ggc_wait with the binary heap of server free times in an array."""
+    free = np.zeros(sn)
+    t = 0.0
+    for i in range(len(a)):
+        t += a[i]
+        f = free[0]
+        if f > t:
+            wq[i] = f - t
+            v = f + s[i]
+        else:
+            wq[i] = 0.0
+            v = t + s[i]
+        # the earliest free time is replaced with v and sifted down
+        j = 0
+        while True:
+            c = 2*j + 1
+            if c >= sn:
+                break
+            if c + 1 < sn and free[c + 1] < free[c]:
+                c += 1
+            if free[c] < v:
+                free[j] = free[c]
+                j = c
+            else:
+                break
+        free[j] = v
+
+
+def _pool_loop(t, s, server, busy, d):
+    """Departure times of requests assigned to independent FIFO servers. The operations
+    are done in the same order as by the NumPy per server cumsum/cummax solution, so
+    the results are identical."""
+    cum = np.zeros(len(busy))
+    m = np.full(len(busy), -np.inf)
+    b0 = busy.copy()
+    for i in range(len(t)):
+        k = server[i]
+        c = cum[k] + s[i]
+        cum[k] = c
+        x = t[i] - (c - s[i])
+        if x > m[k]:
+            m[k] = x
+        d[i] = c + (m[k] if m[k] > b0[k] else b0[k])
+        busy[k] = d[i]
+
+
+if numba is not None:
+    _lindley_loop = numba.njit(cache=True)(_lindley_loop)
+    _ggc_loop = numba.njit(cache=True)(_ggc_loop)
+    _pool_loop = numba.njit(cache=True)(_pool_loop)
+
+
+def pool_departures(t, s, server, busy, backend=None):
+    """This function calculates departure times of requests assigned to independent
+    single-server FIFO queues (e.g. the Edge devices or Cloud servers of msqs systems).
+
+    The state of the servers (times when they become free) is passed in 'busy' and
+    updated in place, so a long trace can be processed chunk by chunk.
+
+    Parameters
+    ----------
+    t : numpy.ndarray
+        Sorted arrival times.
+    s : numpy.ndarray
+        Service times.
+    server : numpy.ndarray
+        Indices of the servers of the requests.
+    busy : numpy.ndarray
+        Times when the servers become free (updated in place).
+    backend : str, optional
+        "numba" - JIT-compiled loop, "numpy" - per server vectorized departure
+        recursion D[j] = S[j] + max(busy, cummax(t[i] - S[i-1])), where S is the
+        cumulative service time. Both give identical results.
+        Defaults "numba" if numba is installed, otherwise "numpy".
+
+    Returns
+    -------
+    d : numpy.ndarray
+        Departure times of the requests.
+    """
+    t = np.ascontiguousarray(t, dtype=float)
+    s = np.ascontiguousarray(s, dtype=float)
+    server = np.ascontiguousarray(server, dtype=np.int64)
+    d = np.empty(len(t))
+    if _backend(backend) == "numba":
+        _pool_loop(t, s, server, busy, d)
+        return d
+    order = np.argsort(server, kind="stable")
+    sorted_server = server[order]
+    bounds = np.flatnonzero(np.diff(sorted_server)) + 1
+    for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(t)]):
+        if end <= start:
+            continue
+        k = sorted_server[start]
+        idx = order[start:end]
+        cum = np.cumsum(s[idx])
+        dk = cum + np.maximum(np.maximum.accumulate(t[idx] - (cum - s[idx])), busy[k])
+        d[idx] = dk
+        busy[k] = dk[-1]
+    return d
+# ==============================================================
+
+
+# ==============================================================
+# simulate function
+# ==============================================================
+def simulate(qs="MM1", ar=None, sn=1, sr=None, s=None, va=None, vs=None, n=None,
+             sim_time=None, warmup=0.05, seed=None, samples=False, backend=None):
+    """This function simulates single-server, multi-server (msqs) and pooled
+    multi-server (ggcqs) queueing systems.
+
+    Notations ending with "1" are simulated as in msqs: the arrival rate is evenly
+    distributed among 'sn' independent servers. Poisson arrivals are split randomly
+    (each server receives a Poisson flow), other arrival processes are split
+    round-robin (the inter-arrival time of a server is the sum of 'sn' inter-arrival
+    times of the system). Every server is simulated by the vectorized Lindley
+    recursion. Notations ending with "C" are simulated with one common queue by
+    the event engine (ggc_wait).
+
+    Parameters
+    ----------
+    qs : str, optional
+        Type of queueing system, e.g. "MM1", "MD1", "MG1", "GG1", "MMC", "GGC".
+        Defaults "MM1".
+    ar : float
+        Arrival rate to the (multi-server) system.
+    sn : int, optional
+        Number of servers. Defaults 1.
+    sr : float, optional
+        Single server service rate. Optional if s is given.
+    s : float, optional
+        Mean service time in single server. Optional if sr is given.
+    va : float, optional
+        Variance of inter-arrival time (of the whole system). Must be provided
+        only for "G" arrivals.
+    vs : float, optional
+        Variance of service time. Must be provided only for "G" service.
+    n : int, optional
+        Number of simulated customers (of the whole system).
+    sim_time : float, optional
+        Simulation time. Used if n is not given: n = ar*sim_time.
+    warmup : float, optional
+        Fraction of the first customers excluded from the statistics. Defaults 0.05.
+    seed : int, numpy.random.SeedSequence or numpy.random.Generator, optional
+        Seed of the random number generator.
+    samples : bool, optional
+        If True, waiting times of all the customers are returned ('wq_samples',
+        'w_samples').
+    backend : str, optional
+        Backend of the simulation kernels: "numba" or "numpy" (see lindley).
+        The results are identical for the same seed.
+
+    Returns
+    -------
+    result : dictionary with such keys
+    'qs' - queueing system notation
+    'ar' - arrival rate
+    'sn' - number of servers
+    's'  - mean service time
+    'n'  - number of customers in the statistics
+    'u'  - the utilization of servers
+    'l'  - mean number of entities in the system (per server for "1" systems)
+    'lq' - mean number of entities in the queue (per server for "1" systems)
+    'wq' - the mean waiting time in queue
+    'w'  - the mean waiting (total time) in system
+
+    Example
+    -------
+    >>> result = simulate(qs="md1", ar=200, sn=10, s=100/3600, sim_time=1000, seed=1)
+    >>> print(result['w']*3600)
+    >>> 162.94...
+    """
+    qs_code(qs, servers="1C")
+    qs_f = qs.replace("/", "").upper()
+    distr_a = qs_f[0]
+    distr_s = qs_f[1]
+    if ar is None or ar <= 0:
+        raise Exception("Wrong parameters. 'ar' must be > 0")
+    if (sr is None) and (s is None):
+        raise Exception("Missing parameters: sr or s must be given.")
+    if s is None:
+        s = 1/sr
+    if distr_a == "G" and va is None:
+        raise Exception("Missing parameters. 'va' value is not provided")
+    if distr_s == "G" and vs is None:
+        raise Exception("Missing parameters. 'vs' value is not provided")
+    if n is None:
+        if sim_time is None:
+            raise Exception("Missing parameters: n or sim_time must be given.")
+        n = int(np.ceil(ar*sim_time))
+    sn = int(sn)
+    if ar*s >= sn:
+        raise Exception("Unstable system: ar must be < sn*sr")
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+    if qs_f[2] == "C" or sn == 1:
+        a = sample_times(distr_a, 1/ar, va, n, rng)
+        st = sample_times(distr_s, s, vs, n, rng)
+        wq = ggc_wait(a, st, sn, backend) if sn > 1 else lindley(a, st, backend)
+        elapsed = np.sum(a)
+        busy = np.sum(st)
+    else:
+        # Independent servers, each receiving ar/sn
+        n1 = int(np.ceil(n/sn))
+        va1 = None if va is None else va*sn
+        a = sample_times(distr_a, sn/ar, va1, (sn, n1), rng)
+        st = sample_times(distr_s, s, vs, (sn, n1), rng)
+        wq = lindley(a, st, backend)
+        elapsed = np.mean(np.sum(a, axis=-1))
+        busy = np.sum(st)
+        wq = wq.ravel(order="F")
+        st = st.ravel(order="F")
+        n = sn*n1
+
+    first = int(warmup*n)
+    wq = wq[first:]
+    w = wq + st[first:]
+    ar1 = ar if qs_f[2] == "C" else ar/sn
+    result = {"qs": qs,
+              "ar": ar,
+              "sn": sn,
+              "s": s,
+              "n": len(wq),
+              "u": busy/(sn*elapsed),
+              "l": ar1*np.mean(w),
+              "lq": ar1*np.mean(wq),
+              "wq": np.mean(wq),
+              "w": np.mean(w)}
+    if samples:
+        result["wq_samples"] = wq
+        result["w_samples"] = w
+    return result
+# ==============================================================
+
+
+# ==============================================================
+# Replicated simulation runner
+# ==============================================================
+def _run_replication(task):
+    """Runs one replication in a worker process (task = (func, parameters, seed, metrics))."""
+    func, parameters, seed, metrics = task
+    result = func(seed=np.random.default_rng(seed), **parameters)
+    return [result[m] for m in metrics]
+
+
+def replicate(scenarios, func=simulate, metrics=("w", "wq", "u"), min_rep=5, max_rep=100,
+              batch=None, confidence=0.95, hw=None, rel_hw=None, target="w", seed=None,
+              processes=None):
+    """This function runs independent replications of simulations for one or many
+    scenarios in a pool of processes and estimates confidence intervals of the results.
+
+    Every scenario and every replication gets its own random stream spawned from one
+    numpy.random.SeedSequence, so the results are reproducible and do not depend on
+    the number of processes. Replications are run in rounds of 'batch' replications
+    per scenario. A scenario is finished when the confidence interval half-width of
+    the 'target' metric reaches 'hw' (absolute) or 'rel_hw' (relative to the mean),
+    or when 'max_rep' replications are done.
+
+    Parameters
+    ----------
+    scenarios : dict or list of dict
+        Keyword arguments of func for every scenario (e.g. parameters of simulate).
+    func : callable, optional
+        Simulation function accepting the keyword argument 'seed' and returning
+        a dictionary of metrics. Must be picklable. Defaults simulate.
+    metrics : tuple of str, optional
+        Metrics to be estimated. Defaults ('w', 'wq', 'u').
+    min_rep : int, optional
+        Minimum number of replications. Defaults 5.
+    max_rep : int, optional
+        Maximum number of replications. Defaults 100.
+    batch : int, optional
+        Number of replications per scenario in a round. Defaults min_rep.
+    confidence : float, optional
+        Confidence level of intervals. Defaults 0.95.
+    hw : float, optional
+        Target absolute half-width of the confidence interval of 'target'.
+    rel_hw : float, optional
+        Target relative half-width of the confidence interval of 'target'.
+    target : str, optional
+        Metric for the stopping rule. Defaults 'w'.
+    seed : int, optional
+        Root seed of the random streams.
+    processes : int, optional
+        Number of worker processes. Defaults os.cpu_count(). With processes=1
+        the replications are run in the calling process.
+
+    Returns
+    -------
+    result : pandas.DataFrame
+        One row per scenario with the scenario parameters, 'n_rep' and, for every
+        metric m, the mean 'm' and the confidence interval half-width 'm_hw'.
+
+    Example
+    -------
+    >>> scenarios = [{'qs': 'md1', 'ar': l, 'sn': 10, 's': 100/3600, 'sim_time': 1000}
+    ...              for l in [200, 250, 300]]
+    >>> result = replicate(scenarios, rel_hw=0.01, seed=1)
+    """
+    import os
+    import pandas as pd
+    from concurrent.futures import ProcessPoolExecutor
+    from scipy import stats
+
+    if isinstance(scenarios, dict):
+        scenarios = [scenarios]
+    if target not in metrics:
+        raise Exception("Wrong parameter: 'target' must be one of 'metrics'")
+    if batch is None:
+        batch = min_rep
+    if processes is None:
+        processes = os.cpu_count() or 1
+    streams = [ss.spawn(max_rep) for ss in np.random.SeedSequence(seed).spawn(len(scenarios))]
+    values = [[] for _ in scenarios]
+    active = list(range(len(scenarios)))
+
+    def half_width(x):
+        n = len(x)
+        if n < 2:
+            return np.full(np.shape(x)[1:], np.inf)
+        return stats.t.ppf((1 + confidence)/2, n - 1)*np.std(x, axis=0, ddof=1)/np.sqrt(n)
+
+    pool = ProcessPoolExecutor(processes) if processes > 1 else None
+    try:
+        while active:
+            tasks = []
+            owners = []
+            for i in active:
+                done = len(values[i])
+                count = min(max(batch, min_rep - done), max_rep - done)
+                for k in range(done, done + count):
+                    tasks.append((func, scenarios[i], streams[i][k], tuple(metrics)))
+                    owners.append(i)
+            results = pool.map(_run_replication, tasks, chunksize=max(1, len(tasks)//(4*processes))) \
+                if pool is not None else map(_run_replication, tasks)
+            for i, res in zip(owners, results):
+                values[i].append(res)
+            still_active = []
+            for i in active:
+                x = np.array(values[i], dtype=float)
+                j = metrics.index(target)
+                h = half_width(x)[j]
+                mean = np.mean(x[:, j])
+                converged = (hw is not None and h <= hw) or \
+                    (rel_hw is not None and h <= rel_hw*abs(mean))
+                if len(x) < max_rep and (len(x) < min_rep or not converged):
+                    still_active.append(i)
+            active = still_active
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    rows = []
+    for scenario, x in zip(scenarios, values):
+        x = np.array(x, dtype=float)
+        row = dict(scenario)
+        row["n_rep"] = len(x)
+        h = half_width(x)
+        for j, m in enumerate(metrics):
+            row[m] = np.mean(x[:, j])
+            row[m + "_hw"] = h[j]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def edge_cloud_scenarios(parameters, sim_time=1000):
+    """This function converts the parameters of calc_system_performance into
+    simulate scenarios of the Edge and Cloud parts of the system.
+
+    Parameters
+    ----------
+    parameters : dict
+        Parameters as in calc_system_performance ('lambda', 'P_E', 'N_E', 'T_E',
+        'T_E_distr', 'N_C', 'T_C', 'T_C_distr').
+    sim_time : float, optional
+        Simulation time [h]. Defaults 1000.
+
+    Returns
+    -------
+    scenarios : dict
+        {'Edge': scenario, 'Cloud': scenario} with the parts that receive requests.
+    """
+    distr = {'Determined': 'md1', 'Exponential': 'mm1'}
+    Lambda = parameters['lambda']
+    P_E = parameters['P_E']
+    scenarios = {}
+    if Lambda*P_E > 0:
+        scenarios['Edge'] = {'qs': distr[parameters['T_E_distr']], 'ar': Lambda*P_E,
+                             'sn': parameters['N_E'], 's': parameters['T_E'],
+                             'sim_time': sim_time}
+    if Lambda*(1 - P_E) > 0:
+        scenarios['Cloud'] = {'qs': distr[parameters['T_C_distr']], 'ar': Lambda*(1 - P_E),
+                              'sn': parameters['N_C'], 's': parameters['T_C'],
+                              'sim_time': sim_time}
+    return scenarios
+# ==============================================================
@@ -0,0 +1,329 @@
+#
+#   Streaming statistics of simulation and trace outputs
+#
+#   The statistics are updated with single values or arrays (chunks) of
+#   values and use constant memory, so they can be collected over billions
+#   of samples. All statistics can be merged, e.g. the statistics collected
+#   by parallel processes or replications.
+#
+#   Author: Paulius Tervydis
+#   Date: 2026-10-18
+#
+# ==============================================================
+import numpy as np
+
+
+# ==============================================================
+# Mean and variance (Welford's algorithm)
+# ==============================================================
+class RunningStats:
+    """Count, mean, variance, minimum and maximum of a stream of values.
+
+    Single values are added with Welford's algorithm, arrays of values and other
+    RunningStats are combined with Chan's parallel formulas.
+
+    Example
+    -------
+    >>> stats = RunningStats()
+    >>> stats.update(np.array([1.0, 2.0, 3.0]))
+    >>> stats.update(4.0)
+    >>> print(stats.n, stats.mean, stats.var)
+    >>> 4 2.5 1.6666666666666667
+    """
+    __slots__ = ("n", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, x):
+        """Adds a value or an array of values."""
+        if np.ndim(x) == 0:
+            x = float(x)
+            self.n += 1
+            delta = x - self.mean
+            self.mean += delta/self.n
+            self.m2 += delta*(x - self.mean)
+            if x < self.min:
+                self.min = x
+            if x > self.max:
+                self.max = x
+            return
+        x = np.asarray(x, dtype=float).ravel()
+        if len(x) > 0:
+            mean = x.mean()
+            self._combine(len(x), mean, ((x - mean)**2).sum(), x.min(), x.max())
+
+    def merge(self, other):
+        """Adds the values of other RunningStats."""
+        if other.n > 0:
+            self._combine(other.n, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def _combine(self, n, mean, m2, xmin, xmax):
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta*n/total
+        self.m2 += m2 + delta**2*self.n*n/total
+        self.n = total
+        self.min = min(self.min, float(xmin))
+        self.max = max(self.max, float(xmax))
+
+    @property
+    def var(self):
+        """Sample variance."""
+        return self.m2/(self.n - 1) if self.n > 1 else np.nan
+
+    @property
+    def std(self):
+        """Sample standard deviation."""
+        return np.sqrt(self.var)
+# ==============================================================
+
+
+# ==============================================================
+# Quantiles (merging t-digest)
+# ==============================================================
+class TDigest:
+    """Quantile sketch of a stream of values (merging t-digest of Dunning).
+
+    The values are buffered and periodically compressed with the existing centroids.
+    The arcsine scale function keeps the centroids at the tails small, so the upper
+    percentiles (p95, p99, p99.9) of latencies are estimated with a small relative error,
+    while the number of centroids stays below ~delta.
+
+    Parameters
+    ----------
+    delta : float, optional
+        Compression parameter. Larger delta gives more accurate quantiles and more
+        centroids. Defaults 200.
+    buffer_size : int, optional
+        Number of buffered values, which triggers the compression. Defaults 4096.
+
+    Example
+    -------
+    >>> digest = TDigest()
+    >>> digest.update(np.random.default_rng(1).exponential(1.0, 1_000_000))
+    >>> print(digest.quantile([0.5, 0.95, 0.99]))
+    >>> [0.69292509 2.98874173 4.59474951]
+    """
+
+    def __init__(self, delta=200, buffer_size=4096):
+        self.delta = delta
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.buffer = []
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, x):
+        """Adds a value or an array of values."""
+        if np.ndim(x) == 0:
+            self.buffer.append(float(x))
+            if len(self.buffer) >= self.buffer_size:
+                self._compress()
+            return
+        x = np.asarray(x, dtype=float).ravel()
+        if len(x) > 0:
+            self._compress(x, np.ones(len(x)))
+
+    def merge(self, other):
+        """Adds the values of other TDigest."""
+        other._compress()
+        if other.n > 0:
+            self._compress(other.means, other.weights)
+        return self
+
+    def _compress(self, means=None, weights=None):
+        """Merges the buffered values and the given centroids into the digest."""
+        parts_m = [self.means]
+        parts_w = [self.weights]
+        if self.buffer:
+            parts_m.append(np.array(self.buffer))
+            parts_w.append(np.ones(len(self.buffer)))
+            self.buffer = []
+        if means is not None:
+            parts_m.append(means)
+            parts_w.append(weights)
+        if len(parts_m) == 1:
+            return
+        m = np.concatenate(parts_m)
+        w = np.concatenate(parts_w)
+        order = np.argsort(m, kind="stable")
+        m = m[order]
+        w = w[order]
+        total = w.sum()
+        self.n = int(round(total))
+        self.min = min(self.min, m[0])
+        self.max = max(self.max, m[-1])
+
+        # Centroids, which start within the same unit interval of the scale
+        # function k(q) = delta/(2*pi)*asin(2q-1), are merged
+        q = (np.cumsum(w) - w)/total
+        k = np.floor(self.delta/(2*np.pi)*np.arcsin(np.clip(2*q - 1, -1, 1)))
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        weights = np.add.reduceat(w, starts)
+        self.means = np.add.reduceat(m*w, starts)/weights
+        self.weights = weights
+
+    def quantile(self, p):
+        """Returns the estimated p quantile(s) of the values."""
+        self._compress()
+        p = np.asarray(p, dtype=float)
+        if self.n == 0:
+            return np.full(p.shape, np.nan)
+        centers = np.cumsum(self.weights) - self.weights/2
+        x = np.r_[0.0, centers, self.weights.sum()]
+        y = np.r_[self.min, self.means, self.max]
+        return np.interp(p*self.weights.sum(), x, y)
+
+    def cdf(self, x):
+        """Returns the estimated fraction of values <= x."""
+        self._compress()
+        x = np.asarray(x, dtype=float)
+        if self.n == 0:
+            return np.full(x.shape, np.nan)
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights/2
+        xp = np.r_[self.min, self.means, self.max]
+        fp = np.r_[0.0, centers, total]/total
+        return np.interp(x, xp, fp, left=0.0, right=1.0)
+
+    def __len__(self):
+        self._compress()
+        return len(self.means)
+# ==============================================================
+
+
+# ==============================================================
+# Time-weighted average (queue length, number of busy servers)
+# ==============================================================
+class TimeAverage:
+    """Time-weighted average of a piecewise constant signal, e.g. of the number of
+    requests in a queue or of the number of busy servers.
+
+    Parameters
+    ----------
+    t0 : float, optional
+        Start time of the observation. Defaults 0.
+    value : float, optional
+        Value of the signal at t0. Defaults 0.
+
+    Example
+    -------
+    >>> queue = TimeAverage()
+    >>> queue.update(1.0, 2)   # 2 requests in the queue from t = 1
+    >>> queue.update(3.0, 0)   # empty queue from t = 3
+    >>> print(queue.mean(4.0))
+    >>> 1.0
+    """
+    __slots__ = ("t0", "t", "value", "area", "max")
+
+    def __init__(self, t0=0.0, value=0.0):
+        self.t0 = t0
+        self.t = t0
+        self.value = value
+        self.area = 0.0
+        self.max = value
+
+    def update(self, t, value):
+        """Sets the value(s) of the signal from the time(s) t (arrays of times must be sorted)."""
+        if np.ndim(t) == 0:
+            self.area += self.value*(t - self.t)
+            self.t = t
+            self.value = value
+            if value > self.max:
+                self.max = value
+            return
+        t = np.asarray(t, dtype=float)
+        value = np.broadcast_to(np.asarray(value, dtype=float), t.shape)
+        if len(t) > 0:
+            self.area += self.value*(t[0] - self.t) + (value[:-1]*np.diff(t)).sum()
+            self.t = t[-1]
+            self.value = value[-1]
+            self.max = max(self.max, value.max())
+
+    def mean(self, t=None):
+        """Returns the time-weighted average up to the time t (the last update time by default)."""
+        if t is None:
+            t = self.t
+        duration = t - self.t0
+        if duration <= 0:
+            return np.nan
+        return (self.area + self.value*(t - self.t))/duration
+
+    def merge(self, other):
+        """Adds the observation of other TimeAverage up to its last update time (e.g. of
+        another replication), so the averages are weighted by the observation durations."""
+        self.area += other.area
+        self.t0 -= other.t - other.t0
+        self.max = max(self.max, other.max)
+        return self
+# ==============================================================
+
+
+# ==============================================================
+# Summary statistics of latencies
+# ==============================================================
+class StreamStats:
+    """Moments (RunningStats) and quantiles (TDigest) of a stream of values, e.g.
+    of request latencies of a network node.
+
+    Parameters
+    ----------
+    quantiles : tuple, optional
+        Probability levels of the quantiles in the summary. Defaults (0.5, 0.95, 0.99).
+    delta : float, optional
+        Compression parameter of the TDigest. Defaults 200.
+
+    Example
+    -------
+    >>> stats = StreamStats()
+    >>> for chunk in np.array_split(np.random.default_rng(1).exponential(1.0, 1_000_000), 10):
+    >>>     stats.update(chunk)
+    >>> print(stats.summary())
+    >>> {'n': 1000000, 'mean': 0.998101, 'std': 0.996111, 'min': 1.66e-06, 'max': 18.690877, 'p50': 0.692921, 'p95': 2.988807, 'p99': 4.594577}
+    """
+
+    def __init__(self, quantiles=(0.5, 0.95, 0.99), delta=200):
+        self.quantiles = tuple(quantiles)
+        self.moments = RunningStats()
+        self.digest = TDigest(delta)
+
+    def update(self, x):
+        """Adds a value or an array of values."""
+        self.moments.update(x)
+        self.digest.update(x)
+
+    def merge(self, other):
+        """Adds the values of other StreamStats."""
+        self.moments.merge(other.moments)
+        self.digest.merge(other.digest)
+        return self
+
+    @property
+    def n(self):
+        return self.moments.n
+
+    def quantile(self, p):
+        """Returns the estimated p quantile(s) of the values."""
+        return self.digest.quantile(p)
+
+    def summary(self):
+        """Returns dictionary of the count, mean, standard deviation, minimum, maximum
+        and quantiles ('p50', 'p95', 'p99' etc.) of the values."""
+        m = self.moments
+        result = {"n": m.n,
+                  "mean": float(m.mean) if m.n > 0 else np.nan,
+                  "std": float(m.std),
+                  "min": float(m.min) if m.n > 0 else np.nan,
+                  "max": float(m.max) if m.n > 0 else np.nan}
+        for p, q in zip(self.quantiles, self.digest.quantile(self.quantiles)):
+            result["p%s" % ("%g" % (100*p)).replace(".", "_")] = float(q)
+        return result
+# ==============================================================
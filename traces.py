@@ -0,0 +1,375 @@
+#
+#   Streaming ingestion of request traces
+#
+#   Request logs (arrival timestamps and service durations) are read in
+#   chunks (CSV) or memory-mapped (binary .npy / raw files) and reduced in
+#   a single pass to windowed arrival rates and moments of inter-arrival
+#   and service times. The results are arrays of 'ar', 'a', 'va', 's', 'vs'
+#   parameters for the vectorized ssqs_batch, msqs_batch and ggcqs functions,
+#   so the trace never has to be loaded into memory. A trace can also be
+#   replayed through the Edge and Cloud servers of a configuration.
+#
+#   Author: Paulius Tervydis
+#   Date: 2026-10-18
+#
+# ==============================================================
+import numpy as np
+import pandas as pd
+from simulation import pool_departures
+from streamstats import StreamStats
+
+
+# ==============================================================
+# Reading of traces in chunks
+# ==============================================================
+def read_trace(source, time_col="timestamp", service_col="service", chunksize=1_000_000, dtype=None):
+    """This function reads a trace of requests in chunks.
+
+    Parameters
+    ----------
+    source : str or tuple
+        Path of the trace file or tuple of arrays (timestamps, service times),
+        e.g. numpy.memmap arrays. Service times array can be None. Files:
+        ".csv" (or compressed ".csv.gz" etc.) - read with pandas in chunks;
+        ".npy" - memory-mapped; a structured array with time_col and service_col
+        fields or a 2-D array with timestamps and service times columns;
+        other files - raw binary files memory-mapped with the structured dtype.
+    time_col : str, optional
+        Name of the arrival timestamps column. Timestamps must be numeric (e.g. s)
+        or date/time strings (converted to seconds). Defaults "timestamp".
+    service_col : str or None, optional
+        Name of the service times column. None if the trace has no service times.
+        Defaults "service".
+    chunksize : int, optional
+        Number of requests in a chunk. Defaults 1 000 000.
+    dtype : numpy.dtype, optional
+        Structured data type of the records of a raw binary file.
+
+    Yields
+    ------
+    t, s : numpy.ndarray
+        Arrival timestamps and service times (None if not available) of a chunk.
+
+    Example
+    -------
+    >>> for t, s in read_trace("requests.csv", time_col="ts", service_col="duration"):
+    >>>     print(len(t))
+    """
+    if isinstance(source, (tuple, list)):
+        times, services = source
+        for start in range(0, len(times), chunksize):
+            s = None if services is None else np.asarray(services[start:start + chunksize], dtype=float)
+            yield np.asarray(times[start:start + chunksize], dtype=float), s
+        return
+
+    path = str(source)
+    if ".csv" in path.lower():
+        usecols = [time_col] if service_col is None else [time_col, service_col]
+        for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+            t = chunk[time_col]
+            if not pd.api.types.is_numeric_dtype(t):
+                t = pd.to_datetime(t).astype("datetime64[ns]").astype("int64")/1e9
+            s = None if service_col is None else chunk[service_col].to_numpy(dtype=float)
+            yield t.to_numpy(dtype=float), s
+        return
+
+    if path.lower().endswith(".npy"):
+        data = np.load(path, mmap_mode="r")
+    else:
+        if dtype is None:
+            raise Exception("Missing parameters. 'dtype' of the raw binary trace is not provided")
+        data = np.memmap(path, dtype=dtype, mode="r")
+    if data.dtype.names is not None:
+        times = data[time_col]
+        services = None if service_col is None else data[service_col]
+    elif data.ndim == 2:
+        times = data[:, 0]
+        services = data[:, 1] if data.shape[1] > 1 and service_col is not None else None
+    else:
+        times = data
+        services = None
+    yield from read_trace((times, services), chunksize=chunksize)
+# ==============================================================
+
+
+# ==============================================================
+# Windowed statistics
+# ==============================================================
+def _combine(acc, idx, x):
+    """Adds values x of windows idx (sorted) to the accumulated counts, means and
+    squared deviations of the windows (Chan's parallel formulas)."""
+    if len(idx) == 0:
+        return
+    lo = idx[0]
+    hi = idx[-1] + 1
+    idx = idx - lo
+    n = np.bincount(idx, minlength=hi - lo).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(idx, x, hi - lo)/n
+        m2 = np.bincount(idx, (x - mean[idx])**2, hi - lo)
+        n0, mean0, m20 = acc[0][lo:hi], acc[1][lo:hi], acc[2][lo:hi]
+        total = n0 + n
+        delta = np.where(n > 0, mean - mean0, 0)
+        acc[1][lo:hi] = np.where(n > 0, mean0 + delta*n/total, mean0)
+        acc[2][lo:hi] = m20 + np.where(n > 0, m2 + delta**2*n0*n/total, 0)
+        acc[0][lo:hi] = total
+
+
+def _grow(acc, size):
+    """Extends the accumulators to 'size' windows."""
+    for i in range(3):
+        acc[i] = np.concatenate([acc[i], np.zeros(size - len(acc[i]))])
+
+
+def trace_windows(source, window=3600, scale=1/3600, origin=None, frame=False, **kwargs):
+    """This function calculates the arrival rates and the means and variances of
+    inter-arrival and service times in time windows of a trace in a single pass.
+
+    The trace is read in chunks (see read_trace), only the per window accumulators
+    are kept in memory. The inter-arrival time of a request is assigned to the window
+    of its arrival. Timestamps must be sorted.
+
+    Parameters
+    ----------
+    source : str or tuple
+        Trace file path or tuple of arrays (see read_trace).
+    window : float, optional
+        Window length in trace time units. Defaults 3600 (1 h if timestamps are in s).
+    scale : float, optional
+        Factor converting trace time units to model time units. Defaults 1/3600
+        (trace in seconds, parameters in hours as in calc_system_performance).
+    origin : float, optional
+        Start of the first window. Defaults the first timestamp rounded down to
+        a multiple of window.
+    frame : bool, optional
+        If True, pandas.DataFrame is returned. Defaults False.
+    kwargs :
+        Parameters of read_trace (time_col, service_col, chunksize, dtype).
+
+    Returns
+    -------
+    windows : dictionary of arrays (one value per window) with such keys
+    't'  - start of the window (trace time units)
+    'n'  - number of arrivals
+    'ar' - arrival rate
+    'a'  - mean inter-arrival time
+    'va' - variance of inter-arrival time
+    's'  - mean service time
+    'vs' - variance of service time
+    Rates and times are in model time units; windows with too few requests have NaN.
+
+    Example
+    -------
+    >>> windows = trace_windows("requests.csv", window=3600, time_col="ts", service_col="duration")
+    >>> result = ssqs_batch(qs="GG1", ar=windows['ar'], s=windows['s'], va=windows['va'], vs=windows['vs'])
+    """
+    ia = [np.zeros(0), np.zeros(0), np.zeros(0)]
+    sv = [np.zeros(0), np.zeros(0), np.zeros(0)]
+    arrivals = np.zeros(0)
+    last = None
+    for t, s in read_trace(source, **kwargs):
+        if len(t) == 0:
+            continue
+        if origin is None:
+            origin = np.floor(t[0]/window)*window
+        if np.any(np.diff(t) < 0) or (last is not None and t[0] < last):
+            raise Exception("Wrong trace: timestamps must be sorted")
+        idx = ((t - origin)//window).astype(np.int64)
+        if idx[0] < 0:
+            raise Exception("Wrong parameters: 'origin' must be <= the first timestamp")
+        size = int(idx[-1]) + 1
+        if size > len(arrivals):
+            arrivals = np.concatenate([arrivals, np.zeros(size - len(arrivals))])
+            _grow(ia, size)
+            _grow(sv, size)
+        arrivals[idx[0]:size] += np.bincount(idx - idx[0])
+        if last is None:
+            gaps, gap_idx = np.diff(t), idx[1:]
+        else:
+            gaps, gap_idx = np.diff(t, prepend=last), idx
+        _combine(ia, gap_idx, gaps)
+        if s is not None:
+            _combine(sv, idx, s)
+        last = t[-1]
+
+    if last is None:
+        raise Exception("Wrong trace: no requests")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        windows = {"t": origin + window*np.arange(len(arrivals)),
+                   "n": arrivals.astype(np.int64),
+                   "ar": arrivals/(window*scale),
+                   "a": np.where(ia[0] > 0, ia[1], np.nan)*scale,
+                   "va": np.where(ia[0] > 1, ia[2]/(ia[0] - 1), np.nan)*scale**2,
+                   "s": np.where(sv[0] > 0, sv[1], np.nan)*scale,
+                   "vs": np.where(sv[0] > 1, sv[2]/(sv[0] - 1), np.nan)*scale**2}
+    if frame:
+        return pd.DataFrame(windows)
+    return windows
+# ==============================================================
+
+
+# ==============================================================
+# Replay of traces through Edge/Cloud configurations
+# ==============================================================
+def _service_times(distr, mean, size, rng):
+    """Service times of the T_E_distr / T_C_distr distribution types."""
+    if distr == "Determined":
+        return np.full(size, float(mean))
+    if distr == "Exponential":
+        return rng.exponential(mean, size)
+    raise Exception("Incompatible distribution type: %s" % distr)
+
+
+def replay(source, parameters, window=3600, scale=1/3600, service="model", split="random",
+           quantiles=(0.5, 0.95, 0.99), seed=None, backend=None, **kwargs):
+    """This function replays a trace of requests through the Edge devices and Cloud
+    servers of a configuration and returns the latency statistics per time window.
+
+    The trace is read in chunks (see read_trace), so memory-mapped traces of 10^8
+    and more requests are replayed in bounded memory: only the states of the servers
+    and the streaming statistics (streamstats.StreamStats) of the windows are kept.
+    As in calc_system_performance, a request is processed by the Edge devices with
+    probability P_E, otherwise by the Cloud servers, and every device (server) is a
+    FIFO queue with its own requests (msqs model).
+
+    Parameters
+    ----------
+    source : str or tuple
+        Trace file path or tuple of arrays (see read_trace).
+    parameters : dict
+        Configuration as in calc_system_performance: 'P_E', 'N_E', 'T_E', 'T_E_distr',
+        'N_C', 'T_C', 'T_C_distr', 'W_cr' (times in model time units, h).
+    window : float, optional
+        Window length in trace time units. Defaults 3600.
+    scale : float, optional
+        Factor converting trace time units to model time units. Defaults 1/3600.
+    service : str, optional
+        "model" - service times are generated by T_E, T_E_distr and T_C, T_C_distr;
+        "trace" - service times of the trace (scaled by 'scale') are used for the
+        Edge devices and are multiplied by T_C/T_E for the Cloud servers.
+        Defaults "model".
+    split : str, optional
+        Distribution of requests among the devices (servers) of a tier: "random"
+        or "round-robin". Defaults "random".
+    quantiles : tuple, optional
+        Probability levels of the reported latency quantiles. Defaults (0.5, 0.95, 0.99).
+    seed : int, optional
+        Seed of the random number generator.
+    backend : str, optional
+        Backend of the simulation kernels ("numba" or "numpy").
+    kwargs :
+        Parameters of read_trace (time_col, service_col, chunksize, dtype).
+
+    Returns
+    -------
+    windows : pandas.DataFrame
+        Per window: start 't', numbers of requests 'n_E', 'n_C', utilizations 'u_E',
+        'u_C' (service time of arrived requests per device and window length), mean
+        latencies 'w_E', 'w_C', 'w' and their quantiles (e.g. 'w_E_p95') and the
+        fraction of requests with latency > W_cr 'p_viol'.
+        Latencies are in model time units. The total StreamStats of the replay are
+        in windows.attrs['stats'] ('E', 'C' and 'all').
+
+    Example
+    -------
+    >>> windows = replay("requests.npy", {'P_E': 0.3, 'N_E': 10, 'T_E': 200/3600, 'T_E_distr': 'Determined',
+    >>>                                   'N_C': 10, 'T_C': 100/3600, 'T_C_distr': 'Determined', 'W_cr': 240/3600})
+    >>> print(windows[['t', 'u_E', 'u_C', 'w_p95', 'p_viol']])
+    """
+    P_E = parameters['P_E']
+    N_E = int(parameters['N_E'])
+    N_C = int(parameters['N_C'])
+    T_E = parameters['T_E']
+    T_C = parameters['T_C']
+    W_cr = parameters.get('W_cr', np.inf)
+    if service not in ("model", "trace"):
+        raise Exception("Wrong parameter: service must be 'model' or 'trace'")
+    if split not in ("random", "round-robin"):
+        raise Exception("Wrong parameter: split must be 'random' or 'round-robin'")
+    if P_E > 0 and N_E <= 0 or P_E < 1 and N_C <= 0:
+        raise Exception("Wrong parameters: N_E must be > 0 if P_E > 0 and N_C must be > 0 if P_E < 1")
+    if service == "trace" and kwargs.get("service_col", "service") is None:
+        raise Exception("Missing parameters: service times of the trace are required for service='trace'")
+    if service == "model":
+        kwargs["service_col"] = None
+
+    rng = np.random.default_rng(seed)
+    tiers = {"E": {"n": N_E, "busy": np.zeros(max(N_E, 1)), "next": 0},
+             "C": {"n": N_C, "busy": np.zeros(max(N_C, 1)), "next": 0}}
+    stats = {"E": StreamStats(quantiles), "C": StreamStats(quantiles), "all": StreamStats(quantiles)}
+    windows = {}
+    origin = None
+    last = None
+    for t, s in read_trace(source, **kwargs):
+        if len(t) == 0:
+            continue
+        if origin is None:
+            origin = np.floor(t[0]/window)*window
+        if np.any(np.diff(t) < 0) or (last is not None and t[0] < last):
+            raise Exception("Wrong trace: timestamps must be sorted")
+        last = t[-1]
+        tm = (t - origin)*scale
+        edge = rng.random(len(t)) < P_E
+        latency = np.empty(len(t))
+        service_time = np.empty(len(t))
+        for key, mask, mean, distr in (("E", edge, T_E, parameters.get('T_E_distr', "Determined")),
+                                       ("C", ~edge, T_C, parameters.get('T_C_distr', "Determined"))):
+            count = int(mask.sum())
+            if count == 0:
+                continue
+            tier = tiers[key]
+            if service == "model":
+                st = _service_times(distr, mean, count, rng)
+            else:
+                st = s[mask]*scale*(1 if key == "E" else T_C/T_E)
+            if split == "random":
+                server = rng.integers(0, tier["n"], count)
+            else:
+                server = (tier["next"] + np.arange(count)) % tier["n"]
+                tier["next"] = (tier["next"] + count) % tier["n"]
+            latency[mask] = pool_departures(tm[mask], st, server, tier["busy"], backend) - tm[mask]
+            service_time[mask] = st
+
+        # Requests are assigned to the windows of their arrivals
+        idx = ((t - origin)//window).astype(np.int64)
+        bounds = np.flatnonzero(np.diff(idx)) + 1
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(t)]):
+            k = int(idx[start])
+            if k not in windows:
+                windows[k] = {"E": StreamStats(quantiles), "C": StreamStats(quantiles),
+                              "all": StreamStats(quantiles), "s_E": 0.0, "s_C": 0.0, "viol": 0}
+            record = windows[k]
+            w = latency[start:end]
+            e = edge[start:end]
+            record["E"].update(w[e])
+            record["C"].update(w[~e])
+            record["all"].update(w)
+            record["s_E"] += service_time[start:end][e].sum()
+            record["s_C"] += service_time[start:end][~e].sum()
+            record["viol"] += int((w > W_cr).sum())
+
+    if origin is None:
+        raise Exception("Wrong trace: no requests")
+    rows = []
+    length = window*scale
+    for k in sorted(windows):
+        record = windows[k]
+        for key in ("E", "C", "all"):
+            stats[key].merge(record[key])
+        row = {"t": origin + k*window,
+               "n_E": record["E"].n,
+               "n_C": record["C"].n,
+               "u_E": record["s_E"]/(N_E*length) if N_E > 0 else 0.0,
+               "u_C": record["s_C"]/(N_C*length) if N_C > 0 else 0.0}
+        for key, name in (("E", "w_E"), ("C", "w_C"), ("all", "w")):
+            summary = record[key].summary()
+            row[name] = summary["mean"]
+            for q in summary:
+                if q.startswith("p"):
+                    row[name + "_" + q] = summary[q]
+        row["p_viol"] = record["viol"]/record["all"].n
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    df.attrs["stats"] = stats
+    return df
+# ==============================================================